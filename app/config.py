@@ -0,0 +1,182 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def get_env_int(name, default):
+    """Read an integer setting from the environment."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+def get_env_bool(name, default):
+    """Read a boolean setting from the environment."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# Executor settings
+EXECUTOR_MAX_WORKERS = get_env_int("EXECUTOR_MAX_WORKERS", 32)
+UPSTREAM_CONCURRENCY = {
+    "ticker": get_env_int("UPSTREAM_CONCURRENCY_TICKER", 16),
+    "market": get_env_int("UPSTREAM_CONCURRENCY_MARKET", 8),
+    "search": get_env_int("UPSTREAM_CONCURRENCY_SEARCH", 8),
+    "screener": get_env_int("UPSTREAM_CONCURRENCY_SCREENER", 4),
+}
+UPSTREAM_CONCURRENCY_DEFAULT = get_env_int("UPSTREAM_CONCURRENCY_DEFAULT", 8)
+
+# Upstream gateway: every Yahoo call is paced by a shared token bucket,
+# retried with jittered exponential backoff on throttling or transient
+# errors, and failed fast by a per-upstream circuit breaker
+UPSTREAM_RATE = float(os.getenv("UPSTREAM_RATE", "10"))
+UPSTREAM_BURST = get_env_int("UPSTREAM_BURST", 20)
+UPSTREAM_MAX_ATTEMPTS = get_env_int("UPSTREAM_MAX_ATTEMPTS", 3)
+UPSTREAM_BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.5"))
+UPSTREAM_BACKOFF_MAX = float(os.getenv("UPSTREAM_BACKOFF_MAX", "8"))
+CIRCUIT_FAILURE_THRESHOLD = get_env_int("CIRCUIT_FAILURE_THRESHOLD", 5)
+CIRCUIT_RESET_TIMEOUT = get_env_int("CIRCUIT_RESET_TIMEOUT", 30)
+
+# Shared HTTP session: keep-alive connection pools to Yahoo, and the cookie
+# and crumb, renewed in the background once older than YAHOO_CRUMB_MAX_AGE
+HTTP_POOL_CONNECTIONS = get_env_int("HTTP_POOL_CONNECTIONS", 10)
+HTTP_POOL_MAXSIZE = get_env_int("HTTP_POOL_MAXSIZE", EXECUTOR_MAX_WORKERS)
+YAHOO_CRUMB_REFRESH_INTERVAL = get_env_int("YAHOO_CRUMB_REFRESH_INTERVAL", 60)
+YAHOO_CRUMB_MAX_AGE = get_env_int("YAHOO_CRUMB_MAX_AGE", 6 * 60 * 60)
+
+# Ticker registry: yf.Ticker objects for the holders endpoints, which share
+# one scrape, are pooled per symbol; least recently used and idle ones evicted
+TICKER_REGISTRY_SIZE = get_env_int("TICKER_REGISTRY_SIZE", 1024)
+TICKER_IDLE_TIMEOUT = get_env_int("TICKER_IDLE_TIMEOUT", 10 * 60)
+
+# Batch endpoint settings
+BATCH_MAX_SYMBOLS = get_env_int("BATCH_MAX_SYMBOLS", 1000)
+BATCH_HISTORY_CHUNK_SIZE = get_env_int("BATCH_HISTORY_CHUNK_SIZE", 100)
+
+# Market summary settings
+MARKET_INDICES = {
+    "US": {
+        "^GSPC": "S&P 500",
+        "^DJI": "Dow Jones Industrial Average",
+        "^IXIC": "NASDAQ Composite",
+        "^RUT": "Russell 2000",
+        "^VIX": "CBOE Volatility Index",
+    },
+    "CA": {"^GSPTSE": "S&P/TSX Composite"},
+    "GB": {"^FTSE": "FTSE 100", "^FTMC": "FTSE 250"},
+    "DE": {"^GDAXI": "DAX"},
+    "FR": {"^FCHI": "CAC 40"},
+    "EU": {"^STOXX50E": "EURO STOXX 50", "^N100": "Euronext 100"},
+    "JP": {"^N225": "Nikkei 225"},
+    "HK": {"^HSI": "Hang Seng Index"},
+    "CN": {"000001.SS": "SSE Composite Index"},
+    "IN": {"^BSESN": "S&P BSE SENSEX", "^NSEI": "NIFTY 50"},
+    "AU": {"^AXJO": "S&P/ASX 200", "^AORD": "All Ordinaries"},
+}
+# Override or add a region with MARKET_INDICES_<REGION>=^SYM1,^SYM2
+for _name, _value in os.environ.items():
+    if _name.startswith("MARKET_INDICES_") and _value.strip():
+        _region = _name[len("MARKET_INDICES_"):].upper()
+        _known = MARKET_INDICES.get(_region, {})
+        MARKET_INDICES[_region] = {
+            symbol.strip(): _known.get(symbol.strip(), symbol.strip())
+            for symbol in _value.split(",") if symbol.strip()
+        }
+MARKET_SUMMARY_REFRESH_INTERVAL = get_env_int("MARKET_SUMMARY_REFRESH_INTERVAL", 30)
+
+# Bundled data files, and a writable directory for locally persisted data
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+STORAGE_DIR = os.getenv("STORAGE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "storage"))
+
+# Market universe used for movers and the equity screener
+MARKET_UNIVERSE_FILE = os.getenv("MARKET_UNIVERSE_FILE", os.path.join(DATA_DIR, "us_large_caps.txt"))
+MOVERS_REFRESH_INTERVAL = get_env_int("MOVERS_REFRESH_INTERVAL", 120)
+
+# Screener settings
+SCREENER_UNIVERSE_FILE = os.getenv("SCREENER_UNIVERSE_FILE", MARKET_UNIVERSE_FILE)
+SCREENER_REFRESH_INTERVAL = get_env_int("SCREENER_REFRESH_INTERVAL", 6 * 60 * 60)
+FUND_UNIVERSE_FILE = os.getenv("FUND_UNIVERSE_FILE", os.path.join(DATA_DIR, "funds.txt"))
+FUND_SCREENER_REFRESH_INTERVAL = get_env_int("FUND_SCREENER_REFRESH_INTERVAL", 24 * 60 * 60)
+
+# Local search index: listings are matched in memory and Yahoo is only
+# searched when nothing matches; the listing file is re-read when it changes
+SEARCH_INDEX_FILE = os.getenv("SEARCH_INDEX_FILE", os.path.join(DATA_DIR, "symbols.csv"))
+SEARCH_INDEX_REFRESH_INTERVAL = get_env_int("SEARCH_INDEX_REFRESH_INTERVAL", 10 * 60)
+SEARCH_LEARNED_MAX = get_env_int("SEARCH_LEARNED_MAX", 10000)
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", "0.4"))
+
+# Local history store: bars of these intervals are kept on disk under
+# HISTORY_STORE_DIR and only the missing tail is fetched from Yahoo; 2m,
+# 15m, 30m, 90m, 1wk, 1mo and 3mo are resampled from 1m, 5m and 1d bars
+HISTORY_STORE_ENABLED = get_env_bool("HISTORY_STORE_ENABLED", True)
+HISTORY_STORE_DIR = os.getenv("HISTORY_STORE_DIR", os.path.join(STORAGE_DIR, "history"))
+HISTORY_STORE_INTERVALS = [
+    interval.strip()
+    for interval in os.getenv("HISTORY_STORE_INTERVALS", "1m,5m,1h,1d").split(",")
+    if interval.strip()
+]
+
+# Prefetching: the PREFETCH_TOP_K most requested keys of these endpoints are
+# refreshed just before they expire (one PREFETCH_INTERVAL round, or a
+# quarter of a long TTL, capped at PREFETCH_LEAD seconds), at no more than
+# PREFETCH_RATE upstream loads per second, and the symbols in
+# PREFETCH_WARM_FILE are loaded at startup
+PREFETCH_INTERVAL = get_env_int("PREFETCH_INTERVAL", 5)
+PREFETCH_ENDPOINTS = [
+    endpoint.strip()
+    for endpoint in os.getenv("PREFETCH_ENDPOINTS", "fast_info,history,market_summary").split(",")
+    if endpoint.strip()
+]
+PREFETCH_TOP_K = get_env_int("PREFETCH_TOP_K", 200)
+PREFETCH_LEAD = get_env_int("PREFETCH_LEAD", 15)
+PREFETCH_RATE = float(os.getenv("PREFETCH_RATE", "5"))
+PREFETCH_HALF_LIFE = get_env_int("PREFETCH_HALF_LIFE", 15 * 60)
+PREFETCH_MIN_HITS = get_env_int("PREFETCH_MIN_HITS", 2)
+PREFETCH_MAX_TRACKED = get_env_int("PREFETCH_MAX_TRACKED", 10000)
+PREFETCH_WARM_FILE = os.getenv("PREFETCH_WARM_FILE", "")
+
+# Cache settings
+CACHE_ENABLED = get_env_bool("CACHE_ENABLED", True)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Bump the version when the stored value format changes, so old entries are ignored
+REDIS_KEY_PREFIX = os.getenv("REDIS_KEY_PREFIX", "yfinance-api:v1:")
+CACHE_EXPIRY = get_env_int("CACHE_EXPIRY", 3600)
+CACHE_MAX_BYTES = get_env_int("CACHE_MAX_BYTES", 256 * 1024 * 1024)
+# Expired entries are kept this much longer, to be served while Yahoo is unavailable
+CACHE_STALE_TTL = get_env_int("CACHE_STALE_TTL", 6 * 60 * 60)
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Freshness policy per kind of data, in seconds. Any of them can be overridden
+# with CACHE_TTL_<NAME>, e.g. CACHE_TTL_FAST_INFO=5.
+_DEFAULT_CACHE_TTLS = {
+    "fast_info": 15,
+    "info": 5 * MINUTE,
+    "history": MINUTE,
+    "indicators": MINUTE,
+    "news": 5 * MINUTE,
+    "corporate_actions": DAY,
+    "earnings_dates": 12 * HOUR,
+    "recommendations": 12 * HOUR,
+    "major_holders": DAY,
+    "institutional_holders": DAY,
+    "mutualfund_holders": DAY,
+    "market_summary": 2 * MINUTE,
+    "search": HOUR,
+    "sustainability": 7 * DAY,
+    "earnings": 7 * DAY,
+    "income_stmt": 7 * DAY,
+    "quarterly_income_stmt": DAY,
+    "balance_sheet": 7 * DAY,
+    "quarterly_balance_sheet": DAY,
+    "cashflow": 7 * DAY,
+    "quarterly_cashflow": DAY,
+}
+CACHE_TTLS = {
+    name: get_env_int(f"CACHE_TTL_{name.upper()}", ttl)
+    for name, ttl in _DEFAULT_CACHE_TTLS.items()
+}
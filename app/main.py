@@ -1,14 +1,71 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 import uvicorn
 
-from app.routers import ticker, market, screener, search
+from app.config import (
+    FUND_SCREENER_REFRESH_INTERVAL,
+    MARKET_SUMMARY_REFRESH_INTERVAL,
+    MOVERS_REFRESH_INTERVAL,
+    PREFETCH_INTERVAL,
+    PREFETCH_WARM_FILE,
+    SCREENER_REFRESH_INTERVAL,
+    SEARCH_INDEX_REFRESH_INTERVAL,
+    YAHOO_CRUMB_REFRESH_INTERVAL,
+)
+from app.routers import ticker, market, screener, search, system, analytics
+from app.models.ticker_models import HistoryParams
+from app.services.history_store import load_history
+from app.services.market_summary import market_summary
+from app.services.movers import movers
+from app.services.screener import equity_screener, fund_screener
+from app.services.quotes import load_fast_info
+from app.services.symbol_index import symbol_index
+from app.services.universe import load_symbols
+from app.utils.cache import response_cache
+from app.utils.executor import executor
+from app.utils import tasks
+from app.utils.prefetch import prefetcher
+from app.utils.serializers import FastJSONResponse
+from app.utils.yahoo_session import yahoo
+
+tasks.schedule("market_summary", MARKET_SUMMARY_REFRESH_INTERVAL, market_summary.refresh)
+tasks.schedule("movers", MOVERS_REFRESH_INTERVAL, movers.refresh)
+tasks.schedule("equity_screener", SCREENER_REFRESH_INTERVAL, equity_screener.refresh)
+tasks.schedule("fund_screener", FUND_SCREENER_REFRESH_INTERVAL, fund_screener.refresh)
+tasks.schedule("symbol_index", SEARCH_INDEX_REFRESH_INTERVAL, symbol_index.refresh)
+tasks.schedule("prefetch", PREFETCH_INTERVAL, prefetcher.run)
+tasks.schedule("yahoo_session", YAHOO_CRUMB_REFRESH_INTERVAL, yahoo.maintain)
+
+def _warm_jobs(symbols):
+    """fast_info and daily history for each symbol, as prefetch jobs."""
+    for symbol in symbols:
+        yield lambda symbol=symbol: load_fast_info(symbol)
+        yield lambda symbol=symbol: load_history(symbol, HistoryParams())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Screen from the last persisted snapshots until the first refresh lands
+    await equity_screener.load_snapshot()
+    await fund_screener.load_snapshot()
+    await symbol_index.refresh()
+    if PREFETCH_WARM_FILE:
+        # Loaded in the background, under the prefetch rate budget
+        prefetcher.warm(_warm_jobs(load_symbols(PREFETCH_WARM_FILE)))
+    tasks.start_all()
+    yield
+    await tasks.stop_all()
+    executor.shutdown()
+    yahoo.close()
+    await response_cache.close()
 
 app = FastAPI(
     title="YFinance API",
     description="API for Yahoo Finance data using yfinance library",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Add CORS middleware
@@ -25,6 +82,8 @@ app.include_router(ticker.router, prefix="/api/ticker", tags=["Ticker"])
 app.include_router(market.router, prefix="/api/market", tags=["Market"])
 app.include_router(screener.router, prefix="/api/screener", tags=["Screener"])
 app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(system.router, prefix="/api/system", tags=["System"])
 
 @app.get("/", include_in_schema=False)
 async def custom_swagger_ui_html():
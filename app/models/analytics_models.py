@@ -0,0 +1,18 @@
+from typing import List, Dict, Any, Optional, Union
+from pydantic import BaseModel, Field
+
+from app.models.ticker_models import HistoryParams
+
+class MatrixParams(HistoryParams):
+    symbols: List[str] = Field(..., description="Ticker symbols to include")
+    period: Optional[str] = Field("1y", description="Data period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)")
+    measure: Optional[str] = Field("correlation", description="Matrix to compute (correlation, covariance, beta)")
+    returns: Optional[str] = Field("log", description="Return type (log, simple)")
+    lookback: Optional[int] = Field(None, description="Use only the last N return observations")
+    min_periods: Optional[int] = Field(2, description="Minimum shared observations for a pair to get a value")
+    orient: Optional[str] = Field("split", description="Payload layout (records, split, columns)")
+
+class AnalyticsResponse(BaseModel):
+    success: bool = True
+    data: Union[Dict[str, Any], List[Any]] = {}
+    error: Optional[str] = None
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from pydantic import BaseModel, Field
 
 class EquityScreenerParams(BaseModel):
@@ -25,6 +25,6 @@ class FundScreenerParams(BaseModel):
 
 class ScreenerResponse(BaseModel):
     success: bool = True
-    data: Dict[str, Any] = {}
+    data: Union[Dict[str, Any], List[Any]] = {}
     count: int = 0
     error: Optional[str] = None 
\ No newline at end of file
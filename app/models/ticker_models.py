@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from pydantic import BaseModel, Field
 from datetime import datetime, date
 
@@ -16,6 +16,25 @@ class HistoryParams(BaseModel):
     rounding: Optional[bool] = Field(False, description="Round values to 2 decimal places")
     timeout: Optional[float] = Field(None, description="Timeout in seconds")
     debug: Optional[bool] = Field(False, description="Debug mode")
+    orient: Optional[str] = Field("records", description="Payload layout (records, split, columns)")
+
+class BatchHistoryParams(HistoryParams):
+    symbols: List[str] = Field(..., description="Ticker symbols to fetch")
+    orient: Optional[str] = Field("columns", description="Payload layout per symbol (records, split, columns)")
+
+class BatchIndicatorParams(BatchHistoryParams):
+    indicators: List[str] = Field(..., description="Indicators to compute, e.g. sma:20, ema:12, rsi:14, macd:12,26,9, bbands:20,2, vwap")
+
+class BatchInfoParams(BaseModel):
+    symbols: List[str] = Field(..., description="Ticker symbols to fetch")
+    timeout: Optional[float] = Field(10, description="Timeout per symbol in seconds")
+    deadline: Optional[float] = Field(30, description="Overall deadline for the batch in seconds")
+
+class BatchActionsParams(BatchInfoParams):
+    kind: Optional[str] = Field("actions", description="Corporate actions to return (actions, dividends, splits)")
+    start: Optional[date] = Field(None, description="Start date in YYYY-MM-DD format")
+    end: Optional[date] = Field(None, description="End date in YYYY-MM-DD format")
+    orient: Optional[str] = Field("records", description="Payload layout per symbol (records, split, columns)")
 
 class DividendParams(BaseModel):
     start: Optional[date] = Field(None, description="Start date in YYYY-MM-DD format")
@@ -29,6 +48,7 @@ class FinancialStatementParams(BaseModel):
     frequency: Optional[str] = Field("yearly", description="Statement frequency (yearly, quarterly)")
     proxy: Optional[str] = Field(None, description="Proxy server")
     as_dict: Optional[bool] = Field(False, description="Return as dictionary")
+    compact: Optional[bool] = Field(False, description="Return a columnar payload (periods, line_items, values matrix)")
 
 class EarningsDateParams(BaseModel):
     limit: Optional[int] = Field(12, description="Number of earnings dates to show")
@@ -36,5 +56,5 @@ class EarningsDateParams(BaseModel):
 
 class TickerResponse(BaseModel):
     success: bool = True
-    data: Dict[str, Any] = {}
+    data: Union[Dict[str, Any], List[Any]] = {}
     error: Optional[str] = None 
\ No newline at end of file
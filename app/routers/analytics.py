@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Header
+from typing import Optional
+import asyncio
+
+from app.config import BATCH_MAX_SYMBOLS
+from app.services.analytics import MEASURES, RETURN_KINDS, load_returns, matrix_frame, measure_matrix
+from app.services.universe import normalize_symbols
+from app.utils.formats import dataframe_response
+from app.models.analytics_models import MatrixParams, AnalyticsResponse
+
+router = APIRouter()
+
+@router.post("/matrix", response_model=AnalyticsResponse)
+async def get_matrix(params: MatrixParams, accept: Optional[str] = Header(None)):
+    """
+    Get the correlation, covariance or beta matrix of several tickers'
+    returns, aligned on their common bars.
+    """
+    try:
+        if params.measure not in MEASURES:
+            return AnalyticsResponse(success=False, error=f"Unknown measure: {params.measure} (expected one of {', '.join(MEASURES)})")
+        if params.returns not in RETURN_KINDS:
+            return AnalyticsResponse(success=False, error=f"Unknown return type: {params.returns} (expected one of {', '.join(RETURN_KINDS)})")
+        symbols = normalize_symbols(params.symbols)
+        if len(symbols) > BATCH_MAX_SYMBOLS:
+            return AnalyticsResponse(success=False, error=f"At most {BATCH_MAX_SYMBOLS} symbols per request")
+
+        symbols, keys, returns, errors = await load_returns(symbols, params)
+        matrix = await asyncio.to_thread(measure_matrix, returns, params.measure, params.min_periods)
+        return dataframe_response(
+            matrix_frame(symbols, matrix), accept, params.orient,
+            observations=len(keys), errors=errors,
+        )
+    except Exception as e:
+        return AnalyticsResponse(success=False, error=str(e))
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any
-import yfinance as yf
-import pandas as pd
 
+from app.services.market_summary import market_summary
+from app.services.movers import movers
+from app.utils.serializers import json_response
 from app.models.market_models import (
     MarketSummaryParams,
     MarketMoversParams,
@@ -11,13 +12,6 @@ from app.models.market_models import (
 
 router = APIRouter()
 
-def dataframe_to_dict(df):
-    """Convert pandas DataFrame to dict with date index as string."""
-    if isinstance(df, pd.DataFrame):
-        df_dict = df.reset_index().to_dict(orient="records")
-        return df_dict
-    return df
-
 @router.get("/summary", response_model=MarketResponse)
 async def get_market_summary(params: MarketSummaryParams = Depends()):
     """
@@ -25,45 +19,29 @@ async def get_market_summary(params: MarketSummaryParams = Depends()):
     """
     try:
         # Note: yfinance doesn't have a direct market summary API,
-        # so we'll get summary for major indices
-        indices = ["^GSPC", "^DJI", "^IXIC", "^RUT", "^VIX"]
-        market_data = {}
-        
-        for index in indices:
-            ticker = yf.Ticker(index)
-            if ticker:
-                info = ticker.info
-                if info:
-                    market_data[index] = {
-                        "shortName": info.get("shortName", ""),
-                        "regularMarketPrice": info.get("regularMarketPrice", None),
-                        "regularMarketChange": info.get("regularMarketChange", None),
-                        "regularMarketChangePercent": info.get("regularMarketChangePercent", None),
-                        "regularMarketTime": info.get("regularMarketTime", None),
-                        "marketCap": info.get("marketCap", None),
-                        "regularMarketVolume": info.get("regularMarketVolume", None),
-                        "regularMarketDayHigh": info.get("regularMarketDayHigh", None),
-                        "regularMarketDayLow": info.get("regularMarketDayLow", None),
-                        "regularMarketOpen": info.get("regularMarketOpen", None),
-                        "regularMarketPreviousClose": info.get("regularMarketPreviousClose", None),
-                    }
-        
-        return MarketResponse(data=market_data)
+        # so we'll get summary for the major indices of the region
+        region = (params.region or "US").upper()
+        if not market_summary.has_region(region):
+            return MarketResponse(success=False, error=f"Unknown region: {region}")
+        market_data = await market_summary.get(region)
+        return json_response(market_data)
     except Exception as e:
         return MarketResponse(success=False, error=str(e))
 
+def _movers_response(result):
+    if result is None:
+        return MarketResponse(success=False, error="Market movers are not available yet, the universe snapshot is still loading")
+    return json_response(result)
+
 @router.get("/movers/gainers", response_model=MarketResponse)
 async def get_market_gainers(params: MarketMoversParams = Depends()):
     """
     Get top gainers in the market.
     """
     try:
-        # Note: yfinance doesn't have a direct market movers API,
-        # This is a placeholder - in a real-world scenario you might need to 
-        # implement a custom solution or use another API
-        
-        # Placeholder for demonstration
-        return MarketResponse(data={"message": "This endpoint requires implementation with a custom solution or additional API"})
+        # Note: yfinance doesn't have a direct market movers API, so movers
+        # are ranked from a background-maintained snapshot of the universe
+        return _movers_response(movers.gainers(params.count))
     except Exception as e:
         return MarketResponse(success=False, error=str(e))
 
@@ -73,8 +51,7 @@ async def get_market_losers(params: MarketMoversParams = Depends()):
     Get top losers in the market.
     """
     try:
-        # Note: similar to gainers, this would need a custom implementation
-        return MarketResponse(data={"message": "This endpoint requires implementation with a custom solution or additional API"})
+        return _movers_response(movers.losers(params.count))
     except Exception as e:
         return MarketResponse(success=False, error=str(e))
 
@@ -84,7 +61,6 @@ async def get_most_active(params: MarketMoversParams = Depends()):
     Get most active stocks in the market.
     """
     try:
-        # Note: similar to gainers, this would need a custom implementation
-        return MarketResponse(data={"message": "This endpoint requires implementation with a custom solution or additional API"})
+        return _movers_response(movers.most_active(params.count))
     except Exception as e:
-        return MarketResponse(success=False, error=str(e)) 
\ No newline at end of file
+        return MarketResponse(success=False, error=str(e))
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any, List
-import yfinance as yf
-import pandas as pd
 
+from app.services.screener import equity_screener, fund_screener
+from app.utils.serializers import json_response
 from app.models.screener_models import (
     EquityScreenerParams,
     FundScreenerParams,
@@ -11,29 +11,18 @@ from app.models.screener_models import (
 
 router = APIRouter()
 
-def dataframe_to_dict(df):
-    """Convert pandas DataFrame to dict with date index as string."""
-    if isinstance(df, pd.DataFrame):
-        df_dict = df.reset_index().to_dict(orient="records")
-        return df_dict
-    return df
-
 @router.post("/equity", response_model=ScreenerResponse)
 async def screen_equity(params: EquityScreenerParams):
     """
     Screen for equities based on specified parameters.
     """
     try:
-        # Note: yfinance does not provide a direct screener API
-        # This is a placeholder for demonstration purposes
-        # In a real implementation, you would need to build a custom screener using data from yfinance
-        # or integrate with another service
-        
-        # For demonstration only
-        return ScreenerResponse(
-            data={"message": "Equity screener requires implementation with custom logic or additional API"},
-            count=0
-        )
+        # Note: yfinance does not provide a direct screener API, so we screen
+        # a periodically refreshed snapshot of fundamentals for our universe
+        result = equity_screener.screen(params)
+        if result is None:
+            return ScreenerResponse(success=False, error="Equity screener is not available yet, the fundamentals snapshot is still loading")
+        return json_response(result, count=result["total"])
     except Exception as e:
         return ScreenerResponse(success=False, error=str(e))
 
@@ -43,16 +32,12 @@ async def screen_fund(params: FundScreenerParams):
     Screen for funds based on specified parameters.
     """
     try:
-        # Note: yfinance does not provide a direct fund screener API
-        # This is a placeholder for demonstration purposes
-        # In a real implementation, you would need to build a custom screener using data from yfinance
-        # or integrate with another service
-        
-        # For demonstration only
-        return ScreenerResponse(
-            data={"message": "Fund screener requires implementation with custom logic or additional API"},
-            count=0
-        )
+        # Note: yfinance does not provide a direct fund screener API, so we
+        # screen a periodically refreshed, locally persisted fund snapshot
+        result = fund_screener.screen(params)
+        if result is None:
+            return ScreenerResponse(success=False, error="Fund screener is not available yet, the fund snapshot is still loading")
+        return json_response(result, count=result["total"])
     except Exception as e:
         return ScreenerResponse(success=False, error=str(e))
 
@@ -62,8 +47,11 @@ async def get_sectors():
     Get list of available sectors.
     """
     try:
-        # This is a placeholder - yfinance doesn't have a direct API for sectors
-        # You would need to implement a custom solution or integrate with another API
+        # yfinance doesn't have a direct API for sectors, so use the ones seen in
+        # the screener snapshot and fall back to a static list until it is loaded
+        if equity_screener.store is not None:
+            sectors = equity_screener.store.categories("sector")
+            return ScreenerResponse(data=sectors, count=len(sectors))
         sectors = [
             "Basic Materials", 
             "Communication Services",
@@ -91,8 +79,11 @@ async def get_industries():
     Get list of available industries.
     """
     try:
-        # This is a placeholder - yfinance doesn't have a direct API for industries
-        # You would need to implement a custom solution or integrate with another API
+        # yfinance doesn't have a direct API for industries, so use the ones seen in
+        # the screener snapshot and fall back to a sample list until it is loaded
+        if equity_screener.store is not None:
+            industries = equity_screener.store.categories("industry")
+            return ScreenerResponse(data=industries, count=len(industries))
         industries = [
             "Aerospace & Defense",
             "Auto Manufacturers",
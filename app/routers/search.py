@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any, List
-import yfinance as yf
 
+from app.services.symbol_index import symbol_index
 from app.models.search_models import (
     SearchParams,
     SearchResponse
@@ -16,24 +16,11 @@ async def search_tickers(
     proxy: str = None
 ):
     """
-    Search for securities by name or ticker symbol.
+    Search for securities by name or ticker symbol, from the local index
+    first and upstream only when nothing matches locally.
     """
     try:
-        # yfinance provides the search() function to search for securities
-        search_results = yf.search(query, limit=limit, proxy=proxy)
-        
-        result_list = []
-        if search_results is not None:
-            # Format the search results
-            for item in search_results:
-                result_list.append({
-                    "symbol": item.get("symbol", ""),
-                    "name": item.get("shortname", ""),
-                    "exchange": item.get("exchange", ""),
-                    "type": item.get("quoteType", ""),
-                    "score": item.get("score", 0)
-                })
-                
+        result_list = await symbol_index.lookup(query, limit, proxy)
         return SearchResponse(
             data=result_list,
             count=len(result_list)
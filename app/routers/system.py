@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from typing import Dict, Any
+
+from app.services.symbol_index import symbol_index
+from app.utils.cache import response_cache
+from app.utils.executor import executor, gateway
+from app.utils.prefetch import prefetcher
+from app.utils.singleflight import flights
+from app.utils.tasks import scheduled_tasks
+from app.utils.ticker_registry import tickers
+from app.utils.yahoo_session import yahoo
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Get runtime metrics for the upstream worker pool, gateway, HTTP session
+    and ticker registry, response cache, request coalescing, background
+    tasks, the search index and prefetching.
+    """
+    return {
+        "executor": executor.stats(),
+        "gateway": gateway.stats(),
+        "http_session": yahoo.stats(),
+        "tickers": tickers.stats(),
+        "cache": response_cache.stats(),
+        "coalescing": flights.stats(),
+        "tasks": {name: task.stats() for name, task in scheduled_tasks.items()},
+        "search_index": symbol_index.stats(),
+        "prefetch": prefetcher.stats(),
+    }
@@ -1,12 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional, Dict, Any
-import yfinance as yf
-import pandas as pd
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional, Dict, Any, List
 from datetime import date
 import json
+import asyncio
 
+from app.config import BATCH_HISTORY_CHUNK_SIZE, BATCH_MAX_SYMBOLS
+from app.services.corporate_actions import KINDS, corporate_actions
+from app.services.history import history_key_params, is_intraday, stream_history
+from app.services.history_store import load_history
+from app.services.indicators import compute_indicators, parse_indicator
+from app.services.quotes import load_fast_info
+from app.services.universe import normalize_symbols
+from app.utils.cache import MISSING, cache_get, cache_set, get_or_load, ttl_for
+from app.utils.download import download_frames
+from app.utils.executor import run_blocking
+from app.utils.formats import ARROW, NDJSON, dataframe_response, negotiate
+from app.utils.serializers import dataframe_to_dict, json_response, statement_to_dict
+from app.utils.ticker_registry import read_attribute
 from app.models.ticker_models import (
     HistoryParams, 
+    BatchHistoryParams, 
+    BatchIndicatorParams, 
+    BatchActionsParams, 
+    BatchInfoParams, 
     DividendParams, 
     SplitParams, 
     FinancialStatementParams, 
@@ -16,12 +33,212 @@ from app.models.ticker_models import (
 
 router = APIRouter()
 
-def dataframe_to_dict(df):
-    """Convert pandas DataFrame to dict with date index as string."""
-    if isinstance(df, pd.DataFrame):
-        df_dict = df.reset_index().to_dict(orient="records")
-        return df_dict
-    return df
+def _get_attribute(symbol, attribute):
+    """Read one of a Ticker's (blocking) attributes, pooled ones no older than their cache TTL."""
+    return read_attribute(symbol, attribute, max_age=ttl_for(attribute))
+
+def _download_history(symbols, params):
+    """Fetch history for several symbols with one threaded yf.download call."""
+    downloaded, errors = download_frames(
+        symbols,
+        period=params.period,
+        interval=params.interval,
+        start=params.start,
+        end=params.end,
+        prepost=params.prepost,
+        auto_adjust=params.auto_adjust,
+        back_adjust=params.back_adjust,
+        repair=params.repair,
+        keepna=params.keepna,
+        proxy=params.proxy,
+        rounding=params.rounding,
+        timeout=params.timeout,
+        actions=True,
+    )
+
+    frames = {}
+    for symbol in symbols:
+        if symbol in errors:
+            continue
+        frame = downloaded.get(symbol)
+        if frame is None:
+            errors[symbol] = "No data returned"
+            continue
+        if frame.empty:
+            errors[symbol] = "No data found"
+            continue
+        frames[symbol] = frame
+    return frames, errors
+
+async def _load_batch(symbols, loader, params):
+    """
+    Run loader(symbol) for every symbol concurrently, with a per-symbol
+    timeout and an overall deadline. Results are keyed by symbol in the
+    order they completed, each with its own status.
+    """
+    async def load(symbol):
+        try:
+            data = await asyncio.wait_for(loader(symbol), params.timeout)
+            return symbol, {"status": "ok", "data": data}
+        except asyncio.TimeoutError:
+            return symbol, {"status": "timeout", "error": f"Timed out after {params.timeout}s"}
+        except Exception as e:
+            return symbol, {"status": "error", "error": str(e)}
+
+    tasks = [asyncio.ensure_future(load(symbol)) for symbol in symbols]
+    results = {}
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=params.deadline):
+            symbol, result = await next_done
+            results[symbol] = result
+    except asyncio.TimeoutError:
+        for task in tasks:
+            task.cancel()
+    for symbol in symbols:
+        results.setdefault(symbol, {"status": "timeout", "error": "Batch deadline exceeded"})
+    return results
+
+async def _load_attribute(symbol, attribute):
+    """Fetch a Ticker attribute through the response cache."""
+    return await get_or_load(
+        attribute, symbol, None,
+        lambda: run_blocking("ticker", _get_attribute, symbol, attribute),
+    )
+
+async def _load_statement(symbol, params, attribute, quarterly_attribute):
+    attribute = quarterly_attribute if params.frequency == "quarterly" else attribute
+    stmt = await _load_attribute(symbol, attribute)
+    return statement_to_dict(stmt, compact=params.compact)
+
+async def _load_indicators(symbol, params, indicators):
+    """
+    Compute indicators over a ticker's history, memoized per history key and
+    indicator list.
+    """
+    key_params = {**history_key_params(params), "indicators": ",".join(indicators)}
+
+    async def compute():
+        history = await load_history(symbol, params)
+        intraday = is_intraday(params.interval)
+        return await asyncio.to_thread(compute_indicators, history, indicators, intraday)
+
+    return await get_or_load("indicators", symbol, key_params, compute)
+
+@router.post("/batch/history", response_model=TickerResponse)
+async def get_batch_history(params: BatchHistoryParams):
+    """
+    Get historical market data for several tickers in one request.
+    """
+    try:
+        symbols = normalize_symbols(params.symbols)
+        if len(symbols) > BATCH_MAX_SYMBOLS:
+            return TickerResponse(success=False, error=f"At most {BATCH_MAX_SYMBOLS} symbols per request")
+
+        key_params = history_key_params(params)
+        frames = {}
+        missing = []
+        for symbol in symbols:
+            cached = await cache_get("history", symbol, key_params)
+            if cached is MISSING:
+                missing.append(symbol)
+            else:
+                frames[symbol] = cached
+
+        errors = {}
+        for start in range(0, len(missing), BATCH_HISTORY_CHUNK_SIZE):
+            chunk = missing[start:start + BATCH_HISTORY_CHUNK_SIZE]
+            try:
+                chunk_frames, chunk_errors = await run_blocking("ticker", _download_history, chunk, params)
+            except Exception as e:
+                chunk_frames, chunk_errors = {}, {symbol: str(e) for symbol in chunk}
+            for symbol, frame in chunk_frames.items():
+                await cache_set("history", symbol, key_params, frame)
+            frames.update(chunk_frames)
+            errors.update(chunk_errors)
+
+        data = {
+            symbol: dataframe_to_dict(frames[symbol], params.orient)
+            for symbol in symbols if symbol in frames
+        }
+        return json_response({"symbols": data, "errors": errors})
+    except Exception as e:
+        return TickerResponse(success=False, error=str(e))
+
+@router.post("/batch/indicators", response_model=TickerResponse)
+async def get_batch_indicators(params: BatchIndicatorParams):
+    """
+    Compute technical indicators over the history of several tickers, and
+    return only the indicator columns.
+    """
+    try:
+        symbols = normalize_symbols(params.symbols)
+        if len(symbols) > BATCH_MAX_SYMBOLS:
+            return TickerResponse(success=False, error=f"At most {BATCH_MAX_SYMBOLS} symbols per request")
+        for spec in params.indicators:
+            parse_indicator(spec)
+
+        results = await asyncio.gather(
+            *(_load_indicators(symbol, params, params.indicators) for symbol in symbols),
+            return_exceptions=True,
+        )
+        data, errors = {}, {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                errors[symbol] = str(result)
+            else:
+                data[symbol] = dataframe_to_dict(result, params.orient)
+        return json_response({"symbols": data, "errors": errors})
+    except Exception as e:
+        return TickerResponse(success=False, error=str(e))
+
+@router.post("/batch/info", response_model=TickerResponse)
+async def get_batch_info(params: BatchInfoParams):
+    """
+    Get basic information for several tickers in one request.
+    """
+    try:
+        symbols = normalize_symbols(params.symbols)
+        if len(symbols) > BATCH_MAX_SYMBOLS:
+            return TickerResponse(success=False, error=f"At most {BATCH_MAX_SYMBOLS} symbols per request")
+        results = await _load_batch(symbols, lambda symbol: _load_attribute(symbol, "info"), params)
+        return TickerResponse(data=results)
+    except Exception as e:
+        return TickerResponse(success=False, error=str(e))
+
+@router.post("/batch/fast_info", response_model=TickerResponse)
+async def get_batch_fast_info(params: BatchInfoParams):
+    """
+    Get basic information for several tickers using the faster API.
+    """
+    try:
+        symbols = normalize_symbols(params.symbols)
+        if len(symbols) > BATCH_MAX_SYMBOLS:
+            return TickerResponse(success=False, error=f"At most {BATCH_MAX_SYMBOLS} symbols per request")
+        results = await _load_batch(symbols, load_fast_info, params)
+        return TickerResponse(data=results)
+    except Exception as e:
+        return TickerResponse(success=False, error=str(e))
+
+@router.post("/batch/actions", response_model=TickerResponse)
+async def get_batch_actions(params: BatchActionsParams):
+    """
+    Get dividends, stock splits or both for several tickers in one request.
+    """
+    try:
+        if params.kind not in KINDS:
+            return TickerResponse(success=False, error=f"Unknown kind: {params.kind} (expected one of {', '.join(KINDS)})")
+        symbols = normalize_symbols(params.symbols)
+        if len(symbols) > BATCH_MAX_SYMBOLS:
+            return TickerResponse(success=False, error=f"At most {BATCH_MAX_SYMBOLS} symbols per request")
+
+        async def load(symbol):
+            frame = await corporate_actions(symbol, params.kind, params.start, params.end)
+            return dataframe_to_dict(frame, params.orient)
+
+        results = await _load_batch(symbols, load, params)
+        return json_response(results)
+    except Exception as e:
+        return TickerResponse(success=False, error=str(e))
 
 @router.get("/{symbol}", response_model=TickerResponse)
 async def get_ticker_info(symbol: str):
@@ -29,8 +246,7 @@ async def get_ticker_info(symbol: str):
     Get basic information about a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
+        info = await _load_attribute(symbol, "info")
         return TickerResponse(data=info)
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
@@ -41,11 +257,7 @@ async def get_ticker_fast_info(symbol: str):
     Get basic information about a ticker using the faster API.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        fast_info = ticker.fast_info
-        # Convert to dict if it's not already
-        if hasattr(fast_info, "__dict__"):
-            fast_info = {k: v for k, v in fast_info.__dict__.items() if not k.startswith("_")}
+        fast_info = await load_fast_info(symbol)
         return TickerResponse(data=fast_info)
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
@@ -53,51 +265,66 @@ async def get_ticker_fast_info(symbol: str):
 @router.get("/{symbol}/history", response_model=TickerResponse)
 async def get_ticker_history(
     symbol: str, 
-    params: HistoryParams = Depends()
+    params: HistoryParams = Depends(),
+    accept: Optional[str] = Header(None)
 ):
     """
     Get historical market data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        history = ticker.history(
-            period=params.period,
-            interval=params.interval,
-            start=params.start,
-            end=params.end,
-            prepost=params.prepost,
-            auto_adjust=params.auto_adjust,
-            back_adjust=params.back_adjust,
-            repair=params.repair,
-            keepna=params.keepna,
-            proxy=params.proxy,
-            rounding=params.rounding,
-            timeout=params.timeout,
-            debug=params.debug
-        )
-        return TickerResponse(data=dataframe_to_dict(history))
+        history = await load_history(symbol, params)
+        return dataframe_response(history, accept, params.orient)
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
 
+@router.get("/{symbol}/indicators", response_model=TickerResponse)
+async def get_ticker_indicators(
+    symbol: str,
+    params: HistoryParams = Depends(),
+    indicators: List[str] = Query(..., description="Indicators to compute, e.g. sma:20, rsi:14, macd:12,26,9"),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Compute technical indicators over a ticker's history, and return only
+    the indicator columns.
+    """
+    try:
+        for spec in indicators:
+            parse_indicator(spec)
+        result = await _load_indicators(symbol, params, indicators)
+        return dataframe_response(result, accept, params.orient)
+    except Exception as e:
+        return TickerResponse(success=False, error=str(e))
+
+@router.get("/{symbol}/history/stream")
+async def stream_ticker_history(
+    symbol: str,
+    params: HistoryParams = Depends(),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Stream historical market data for a ticker as it is fetched, window by
+    window: NDJSON (one bar per line) by default, or an Arrow IPC stream.
+    """
+    media_type = negotiate(accept, (NDJSON, ARROW))
+    return StreamingResponse(
+        stream_history(symbol, params, media_type),
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
+
 @router.get("/{symbol}/dividends", response_model=TickerResponse)
 async def get_ticker_dividends(
     symbol: str,
-    params: DividendParams = Depends()
+    params: DividendParams = Depends(),
+    accept: Optional[str] = Header(None)
 ):
     """
     Get dividend data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        dividends = ticker.dividends
-        
-        if params.start or params.end:
-            if params.start:
-                dividends = dividends[dividends.index >= params.start]
-            if params.end:
-                dividends = dividends[dividends.index <= params.end]
-                
-        return TickerResponse(data=dataframe_to_dict(dividends))
+        dividends = await corporate_actions(symbol, "dividends", params.start, params.end)
+        return dataframe_response(dividends, accept)
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
 
@@ -110,16 +337,8 @@ async def get_ticker_splits(
     Get stock splits data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        splits = ticker.splits
-        
-        if params.start or params.end:
-            if params.start:
-                splits = splits[splits.index >= params.start]
-            if params.end:
-                splits = splits[splits.index <= params.end]
-                
-        return TickerResponse(data=dataframe_to_dict(splits))
+        splits = await corporate_actions(symbol, "splits", params.start, params.end)
+        return json_response(dataframe_to_dict(splits))
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
 
@@ -127,22 +346,15 @@ async def get_ticker_splits(
 async def get_ticker_actions(
     symbol: str,
     start: Optional[date] = None,
-    end: Optional[date] = None
+    end: Optional[date] = None,
+    accept: Optional[str] = Header(None)
 ):
     """
     Get dividend and stock splits data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        actions = ticker.actions
-        
-        if start or end:
-            if start:
-                actions = actions[actions.index >= start]
-            if end:
-                actions = actions[actions.index <= end]
-                
-        return TickerResponse(data=dataframe_to_dict(actions))
+        actions = await corporate_actions(symbol, "actions", start, end)
+        return dataframe_response(actions, accept)
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
 
@@ -155,17 +367,7 @@ async def get_ticker_income_statement(
     Get income statement data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        if params.frequency == "quarterly":
-            income_stmt = ticker.quarterly_income_stmt
-        else:
-            income_stmt = ticker.income_stmt
-            
-        result = {}
-        for col in income_stmt.columns:
-            result[str(col.date())] = {row: income_stmt[col][row] for row in income_stmt.index}
-            
-        return TickerResponse(data=result)
+        return json_response(await _load_statement(symbol, params, "income_stmt", "quarterly_income_stmt"))
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
 
@@ -178,17 +380,7 @@ async def get_ticker_balance_sheet(
     Get balance sheet data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        if params.frequency == "quarterly":
-            balance = ticker.quarterly_balance_sheet
-        else:
-            balance = ticker.balance_sheet
-            
-        result = {}
-        for col in balance.columns:
-            result[str(col.date())] = {row: balance[col][row] for row in balance.index}
-            
-        return TickerResponse(data=result)
+        return json_response(await _load_statement(symbol, params, "balance_sheet", "quarterly_balance_sheet"))
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
 
@@ -201,17 +393,7 @@ async def get_ticker_cashflow(
     Get cash flow data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        if params.frequency == "quarterly":
-            cashflow = ticker.quarterly_cashflow
-        else:
-            cashflow = ticker.cashflow
-            
-        result = {}
-        for col in cashflow.columns:
-            result[str(col.date())] = {row: cashflow[col][row] for row in cashflow.index}
-            
-        return TickerResponse(data=result)
+        return json_response(await _load_statement(symbol, params, "cashflow", "quarterly_cashflow"))
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
 
@@ -224,8 +406,7 @@ async def get_ticker_earnings(
     Get earnings data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        earnings = ticker.earnings
+        earnings = await _load_attribute(symbol, "earnings")
         
         return TickerResponse(data=earnings.to_dict())
     except Exception as e:
@@ -234,17 +415,17 @@ async def get_ticker_earnings(
 @router.get("/{symbol}/earnings_dates", response_model=TickerResponse)
 async def get_ticker_earnings_dates(
     symbol: str,
-    params: EarningsDateParams = Depends()
+    params: EarningsDateParams = Depends(),
+    accept: Optional[str] = Header(None)
 ):
     """
     Get earnings dates for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        earnings_dates = ticker.earnings_dates
+        earnings_dates = await _load_attribute(symbol, "earnings_dates")
         
         if earnings_dates is not None:
-            return TickerResponse(data=dataframe_to_dict(earnings_dates))
+            return dataframe_response(earnings_dates, accept)
         return TickerResponse(data=[])
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
@@ -255,8 +436,7 @@ async def get_ticker_sustainability(symbol: str):
     Get sustainability data for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        sustainability = ticker.sustainability
+        sustainability = await _load_attribute(symbol, "sustainability")
         
         if sustainability is not None:
             return TickerResponse(data=sustainability.to_dict())
@@ -270,11 +450,10 @@ async def get_ticker_recommendations(symbol: str):
     Get analyst recommendations for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        recommendations = ticker.recommendations
+        recommendations = await _load_attribute(symbol, "recommendations")
         
         if recommendations is not None:
-            return TickerResponse(data=dataframe_to_dict(recommendations))
+            return json_response(dataframe_to_dict(recommendations))
         return TickerResponse(data=[])
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
@@ -285,8 +464,7 @@ async def get_ticker_news(symbol: str):
     Get news for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        news = ticker.news
+        news = await _load_attribute(symbol, "news")
         
         if news:
             return TickerResponse(data=news)
@@ -300,8 +478,7 @@ async def get_ticker_major_holders(symbol: str):
     Get major holders for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        holders = ticker.major_holders
+        holders = await _load_attribute(symbol, "major_holders")
         
         if holders is not None:
             return TickerResponse(data=holders.to_dict())
@@ -315,11 +492,10 @@ async def get_ticker_institutional_holders(symbol: str):
     Get institutional holders for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        holders = ticker.institutional_holders
+        holders = await _load_attribute(symbol, "institutional_holders")
         
         if holders is not None:
-            return TickerResponse(data=dataframe_to_dict(holders))
+            return json_response(dataframe_to_dict(holders))
         return TickerResponse(data=[])
     except Exception as e:
         return TickerResponse(success=False, error=str(e))
@@ -330,11 +506,10 @@ async def get_ticker_mutualfund_holders(symbol: str):
     Get mutual fund holders for a ticker.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        holders = ticker.mutualfund_holders
+        holders = await _load_attribute(symbol, "mutualfund_holders")
         
         if holders is not None:
-            return TickerResponse(data=dataframe_to_dict(holders))
+            return json_response(dataframe_to_dict(holders))
         return TickerResponse(data=[])
     except Exception as e:
         return TickerResponse(success=False, error=str(e)) 
\ No newline at end of file
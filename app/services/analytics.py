@@ -0,0 +1,131 @@
+import asyncio
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.history import is_intraday
+from app.services.history_store import load_history
+from app.utils.serializers import ColumnFrame
+
+MEASURES = ("correlation", "covariance", "beta")
+RETURN_KINDS = ("log", "simple")
+
+def _closes(history) -> np.ndarray:
+    column = "Adj Close" if "Adj Close" in history.columns else "Close"
+    return np.asarray(history[column], dtype=float)
+
+def _bar_keys(index: pd.DatetimeIndex, intraday: bool) -> np.ndarray:
+    """
+    int64 alignment keys: the UTC instant for intraday bars, the exchange-local
+    date otherwise, so daily bars of different timezones share a row.
+    """
+    if not intraday and index.tz is not None:
+        index = index.tz_localize(None)
+    return index.as_unit("ns").asi8
+
+def symbol_returns(history, kind: str, intraday: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns of one symbol over its own consecutive bars, keyed by the bar
+    they end on. Computing them before alignment keeps a missing day from
+    turning the neighbouring returns into NaN.
+    """
+    closes = _closes(history)
+    keys = _bar_keys(history.index, intraday)
+    traded = np.isfinite(closes) & (closes > 0)
+    closes, keys = closes[traded], keys[traded]
+    if kind == "log":
+        returns = np.diff(np.log(closes))
+    else:
+        returns = closes[1:] / closes[:-1] - 1.0
+    return keys[1:], returns
+
+def align_returns(
+    histories: Dict[str, object], kind: str, intraday: bool, lookback: int = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    A (bars x symbols) returns matrix over the union of the symbols' bars,
+    NaN where a symbol has no return, limited to the last `lookback` bars.
+    """
+    series = [symbol_returns(history, kind, intraday) for history in histories.values()]
+    keys = np.unique(np.concatenate([key for key, _ in series])) if series else np.empty(0, dtype=np.int64)
+    if lookback:
+        keys = keys[-lookback:]
+    matrix = np.full((len(keys), len(series)), np.nan)
+    for column, (symbol_keys, returns) in enumerate(series):
+        positions = np.searchsorted(keys, symbol_keys)
+        inside = positions < len(keys)
+        inside[inside] = keys[positions[inside]] == symbol_keys[inside]
+        matrix[positions[inside], column] = returns[inside]
+    return keys, matrix
+
+def pairwise_moments(returns: np.ndarray, min_periods: int = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pairwise-complete covariance, and each symbol's variance over the bars it
+    shares with every other symbol, for all pairs at once: the missing
+    values are zeroed and a presence mask turns the sums into matrix
+    products.
+
+    Returns (covariance, variance of the row symbol, observations), where
+    variance[i, j] is the variance of symbol i over the bars it shares with j.
+    """
+    present = np.isfinite(returns)
+    # Centre each column first; covariance is shift-invariant and the sums stay small
+    with np.errstate(invalid="ignore"):
+        centre = np.nanmean(np.where(present, returns, np.nan), axis=0)
+    values = np.where(present, returns - np.nan_to_num(centre), 0.0)
+    mask = present.astype(float)
+
+    observations = mask.T @ mask
+    sums = values.T @ mask
+    products = values.T @ values
+    squares = (values * values).T @ mask
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = (products - sums * sums.T / observations) / (observations - 1)
+        variance = (squares - sums * sums / observations) / (observations - 1)
+    too_few = observations < max(min_periods, 2)
+    covariance[too_few] = np.nan
+    variance[too_few] = np.nan
+    return covariance, variance, observations
+
+def measure_matrix(returns: np.ndarray, measure: str, min_periods: int = 2) -> np.ndarray:
+    """
+    Correlation, covariance or beta matrix of a returns matrix. beta[i, j] is
+    the beta of symbol i against symbol j.
+    """
+    covariance, variance, _ = pairwise_moments(returns, min_periods)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if measure == "covariance":
+            return covariance
+        if measure == "beta":
+            return covariance / variance.T
+        correlation = covariance / np.sqrt(variance * variance.T)
+    np.clip(correlation, -1.0, 1.0, out=correlation)
+    return correlation
+
+async def load_returns(symbols: List[str], params) -> Tuple[List[str], np.ndarray, np.ndarray, Dict[str, str]]:
+    """
+    Load every symbol's history through the history path and align their
+    returns. Symbols that fail to load are reported in the errors.
+    """
+    results = await asyncio.gather(
+        *(load_history(symbol, params) for symbol in symbols),
+        return_exceptions=True,
+    )
+    histories, errors = {}, {}
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, Exception):
+            errors[symbol] = str(result)
+        elif len(result) < 2:
+            errors[symbol] = "Not enough history"
+        else:
+            histories[symbol] = result
+    intraday = is_intraday(params.interval)
+    keys, returns = await asyncio.to_thread(align_returns, histories, params.returns, intraday, params.lookback)
+    return list(histories), keys, returns, errors
+
+def matrix_frame(symbols: List[str], matrix: np.ndarray) -> ColumnFrame:
+    """A symbols x symbols matrix as a frame, one column per symbol."""
+    index = pd.Index(symbols, name="Symbol")
+    return ColumnFrame(index, {symbol: matrix[:, column] for column, symbol in enumerate(symbols)})
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.cache import get_or_load
+from app.utils.executor import run_blocking
+from app.utils.gateway import UpstreamUnavailable
+from app.utils.serializers import ColumnFrame
+from app.utils.ticker_registry import new_ticker
+
+KINDS = ("actions", "dividends", "splits")
+
+def _frame(index: pd.Index, columns: Dict[str, np.ndarray]) -> ColumnFrame:
+    return ColumnFrame(index, {name: np.ascontiguousarray(values) for name, values in columns.items()})
+
+def build_corporate_actions(actions: pd.DataFrame) -> Dict[str, ColumnFrame]:
+    """
+    Split one Ticker.actions frame into the three views the endpoints serve,
+    each on its own sorted index: every action, dividends only, splits only.
+    """
+    if not isinstance(actions.index, pd.DatetimeIndex):
+        actions = actions.set_axis(pd.DatetimeIndex(actions.index, name=actions.index.name or "Date"))
+    actions = actions.sort_index()
+    index = actions.index
+    columns = {str(name): actions[name].to_numpy(dtype=float) for name in actions.columns}
+
+    frames = {"actions": _frame(index, columns)}
+    for kind, column in (("dividends", "Dividends"), ("splits", "Stock Splits")):
+        values = columns.get(column, np.empty(0))
+        rows = np.flatnonzero(values != 0)
+        frames[kind] = _frame(index[rows], {column: values[rows]})
+    return frames
+
+def _fetch_corporate_actions(symbol: str) -> Dict[str, ColumnFrame]:
+    actions = new_ticker(symbol).actions
+    if not isinstance(actions, pd.DataFrame):
+        # yfinance returns [] only when history() failed (a symbol without
+        # actions gets an empty frame): an outage or an unknown symbol, and
+        # either way not "no dividends" to cache. Served stale if possible.
+        raise UpstreamUnavailable(f"No history for {symbol}: Yahoo is unavailable or the symbol is unknown")
+    return build_corporate_actions(actions)
+
+def _bound(index: pd.DatetimeIndex, day: date) -> pd.Timestamp:
+    return pd.Timestamp(day).tz_localize(index.tz) if index.tz is not None else pd.Timestamp(day)
+
+def between(frame: ColumnFrame, start: Optional[date] = None, end: Optional[date] = None) -> ColumnFrame:
+    """
+    The rows from start to end (inclusive exchange-local dates), found by
+    binary search on the sorted index. The columns are views, not copies.
+    """
+    index = frame.index
+    lower = index.searchsorted(_bound(index, start)) if start else 0
+    upper = index.searchsorted(_bound(index, end + timedelta(days=1))) if end else len(index)
+    if lower == 0 and upper == len(index):
+        return frame
+    return ColumnFrame(index[lower:upper], {name: values[lower:upper] for name, values in frame.data.items()})
+
+async def load_corporate_actions(symbol: str) -> Dict[str, ColumnFrame]:
+    """A symbol's dividends, splits and actions, fetched once through the response cache."""
+    return await get_or_load(
+        "corporate_actions", symbol, None,
+        lambda: run_blocking("ticker", _fetch_corporate_actions, symbol),
+    )
+
+async def corporate_actions(symbol: str, kind: str, start: Optional[date] = None, end: Optional[date] = None) -> ColumnFrame:
+    frames = await load_corporate_actions(symbol)
+    return between(frames[kind], start, end)
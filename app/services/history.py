@@ -0,0 +1,407 @@
+import asyncio
+import io
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from app.models.ticker_models import HistoryParams
+from app.utils.executor import run_blocking
+from app.utils.formats import ARROW, arrow_table
+from app.utils.serializers import ColumnFrame, dataframe_to_dict, json_dumps
+from app.utils.ticker_registry import new_ticker
+
+logger = logging.getLogger(__name__)
+
+# Per interval: (segment length requested at a time, furthest Yahoo goes back).
+# 1m bars are served at most 7 days per request and 30 days back, other
+# intraday bars 60 days back and hourly bars 730 days back.
+INTERVAL_LIMITS = {
+    "1m": (timedelta(days=7), timedelta(days=30)),
+    "2m": (timedelta(days=10), timedelta(days=60)),
+    "5m": (timedelta(days=10), timedelta(days=60)),
+    "15m": (timedelta(days=10), timedelta(days=60)),
+    "30m": (timedelta(days=10), timedelta(days=60)),
+    "90m": (timedelta(days=10), timedelta(days=60)),
+    "60m": (timedelta(days=100), timedelta(days=730)),
+    "1h": (timedelta(days=100), timedelta(days=730)),
+    "1d": (timedelta(days=3 * 365), None),
+    "5d": (timedelta(days=3 * 365), None),
+    "1wk": (timedelta(days=50 * 365), None),
+    "1mo": (timedelta(days=50 * 365), None),
+    "3mo": (timedelta(days=50 * 365), None),
+}
+
+# Yahoo measures lookback limits from its own clock, so keep clear of the edge
+_LOOKBACK_MARGIN = timedelta(days=1)
+
+# How far back period=max goes when the first trade date is unknown
+_MAX_HISTORY = timedelta(days=99 * 365)
+
+_PERIOD = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+def period_start(period: str, end: datetime) -> Optional[datetime]:
+    """Start of a yfinance period ending at `end`; None for max."""
+    period = period.lower()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return datetime(end.year, 1, 1)
+    match = _PERIOD.match(period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return end - timedelta(days=count)
+    if unit == "wk":
+        return end - timedelta(weeks=count)
+    if unit == "mo":
+        return end - relativedelta(months=count)
+    return end - relativedelta(years=count)
+
+def _as_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return value
+
+def plan_windows(
+    interval: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    now: datetime,
+) -> List[Tuple[datetime, Optional[datetime]]]:
+    """
+    Split [start, end) into the consecutive windows a range is fetched in,
+    oldest first. Times are naive and read by yfinance in the exchange's
+    timezone; a None end means "up to now". start is clamped to how far
+    back Yahoo serves the interval.
+    """
+    if interval not in INTERVAL_LIMITS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    segment, lookback = INTERVAL_LIMITS[interval]
+    if lookback is not None:
+        earliest = now - lookback + _LOOKBACK_MARGIN
+        start = earliest if start is None else max(start, earliest)
+    elif start is None:
+        start = now - _MAX_HISTORY
+    stop = end or now
+
+    windows = []
+    while start < stop:
+        window_end = start + segment
+        if window_end >= stop:
+            windows.append((start, end))
+            break
+        windows.append((start, window_end))
+        start = window_end
+    return windows
+
+def is_intraday(interval: str) -> bool:
+    return (interval.endswith("m") and not interval.endswith("mo")) or interval.endswith("h")
+
+def _first_trade_date(symbol: str) -> Optional[datetime]:
+    try:
+        first = new_ticker(symbol).get_history_metadata().get("firstTradeDate")
+    except Exception:
+        return None
+    if first is None:
+        return None
+    first = pd.Timestamp(first)
+    return (first.tz_localize(None) if first.tz is not None else first).to_pydatetime()
+
+def fetch_history(symbol: str, params) -> pd.DataFrame:
+    """Ticker.history() for a full set of HistoryParams, in one upstream call."""
+    ticker = new_ticker(symbol)
+    return ticker.history(
+        period=params.period,
+        interval=params.interval,
+        start=params.start,
+        end=params.end,
+        prepost=params.prepost,
+        auto_adjust=params.auto_adjust,
+        back_adjust=params.back_adjust,
+        repair=params.repair,
+        keepna=params.keepna,
+        proxy=params.proxy,
+        rounding=params.rounding,
+        timeout=params.timeout,
+        debug=params.debug
+    )
+
+def history_key_params(params) -> Dict[str, Any]:
+    """The HistoryParams fields that identify the data, for cache keys."""
+    # proxy, timeout and debug change how the data is fetched, not what it
+    # is, and orient only changes how it is encoded
+    return params.model_dump(
+        include=set(HistoryParams.model_fields),
+        exclude={"proxy", "timeout", "debug", "orient"},
+    )
+
+def _fetch_window(symbol: str, params, start: datetime, end: Optional[datetime]) -> pd.DataFrame:
+    return new_ticker(symbol).history(
+        interval=params.interval,
+        start=start,
+        end=end,
+        prepost=params.prepost,
+        auto_adjust=params.auto_adjust,
+        back_adjust=params.back_adjust,
+        repair=params.repair,
+        keepna=params.keepna,
+        proxy=params.proxy,
+        rounding=params.rounding,
+        timeout=params.timeout,
+        raise_errors=False,
+    )
+
+async def history_windows(symbol: str, params) -> List[Tuple[datetime, Optional[datetime]]]:
+    """Resolve the params' period or start/end into fetch windows."""
+    now = datetime.utcnow()
+    end = _as_datetime(params.end)
+    start = _as_datetime(params.start)
+    if start is None and params.period:
+        start = period_start(params.period, end or now)
+    if start is None and INTERVAL_LIMITS.get(params.interval, (None, None))[1] is None:
+        # period=max: begin at the first trade rather than probing empty decades
+        start = await run_blocking("ticker", _first_trade_date, symbol)
+    return plan_windows(params.interval, start, end, now)
+
+async def history_segments(symbol: str, params) -> AsyncIterator[pd.DataFrame]:
+    """
+    Yield the history of a range one window at a time, oldest first. The
+    next window is fetched while the current one is being consumed, so at
+    most two windows are held in memory.
+    """
+    windows = await history_windows(symbol, params)
+    if not windows:
+        return
+    last = None
+    pending = asyncio.ensure_future(run_blocking("ticker", _fetch_window, symbol, params, *windows[0]))
+    try:
+        for i in range(len(windows)):
+            frame = await pending
+            if i + 1 < len(windows):
+                pending = asyncio.ensure_future(
+                    run_blocking("ticker", _fetch_window, symbol, params, *windows[i + 1])
+                )
+            if frame is None or frame.empty:
+                continue
+            if last is not None:
+                # Windows meet at their boundaries; never repeat a bar
+                frame = frame[frame.index > last]
+                if frame.empty:
+                    continue
+            last = frame.index[-1]
+            yield frame
+    finally:
+        if not pending.done():
+            pending.cancel()
+
+async def stream_ndjson(symbol: str, params) -> AsyncIterator[bytes]:
+    """One JSON object per bar and line. A failure ends the stream with an {"error": ...} line."""
+    try:
+        async for frame in history_segments(symbol, params):
+            rows = dataframe_to_dict(frame, "records")
+            yield b"".join(json_dumps(row) + b"\n" for row in rows)
+    except Exception as e:
+        logger.warning("History stream for %s failed: %s", symbol, e)
+        yield json_dumps({"error": str(e)}) + b"\n"
+
+async def stream_arrow(symbol: str, params) -> AsyncIterator[bytes]:
+    """
+    An Arrow IPC stream with one or more record batches per window. Arrow
+    has no in-band errors, so a failure aborts the response without the
+    end-of-stream marker, and readers see a truncated stream, not a short one.
+    """
+    import pyarrow as pa
+    sink = io.BytesIO()
+    writer = None
+    schema = None
+    columns = None
+    try:
+        async for frame in history_segments(symbol, params):
+            if writer is None:
+                table = arrow_table(frame)
+                schema = table.schema
+                columns = list(frame.columns)
+                writer = pa.ipc.new_stream(sink, schema)
+            else:
+                # Later windows may lack or add event columns (e.g. Capital Gains)
+                table = arrow_table(frame.reindex(columns=columns), schema)
+            writer.write_table(table)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    except Exception as e:
+        logger.warning("History stream for %s failed: %s", symbol, e)
+        raise
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+def stream_history(symbol: str, params, media_type: str) -> AsyncIterator[bytes]:
+    """Stream a history range as NDJSON rows or Arrow record batches."""
+    if media_type == ARROW:
+        return stream_arrow(symbol, params)
+    return stream_ndjson(symbol, params)
+
+# Intervals computed from stored bars of a finer base interval
+DERIVED_INTERVALS = {
+    "2m": "1m",
+    "15m": "5m",
+    "30m": "5m",
+    "90m": "5m",
+    "1wk": "1d",
+    "1mo": "1d",
+    "3mo": "1d",
+}
+
+_MINUTE_NS = 60 * 1_000_000_000
+_DAY_NS = 24 * 60 * _MINUTE_NS
+
+_BUCKET_MINUTES = {"2m": 2, "15m": 15, "30m": 30, "90m": 90}
+
+def can_derive(interval: str, prepost: bool) -> bool:
+    """
+    Whether bars of `interval` can be computed from its base interval. With
+    prepost there is no single session open, so only widths that divide 30
+    minutes (which are aligned to the clock) can be derived.
+    """
+    if interval not in DERIVED_INTERVALS:
+        return False
+    return not (prepost and interval in _BUCKET_MINUTES and 30 % _BUCKET_MINUTES[interval])
+
+def _local_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """Wall-clock times in the index's timezone, as nanoseconds."""
+    return index.tz_localize(None).asi8 if index.tz is not None else index.asi8
+
+def session_open(index: pd.DatetimeIndex) -> int:
+    """
+    The regular session's opening time, in nanoseconds after local
+    midnight: the most common time of each day's first bar, so a day
+    missing its opening bar does not move it.
+    """
+    local = _local_ns(index)
+    days = local // _DAY_NS
+    first = np.r_[True, days[1:] != days[:-1]]
+    opens, counts = np.unique(local[first] - days[first] * _DAY_NS, return_counts=True)
+    return int(opens[np.argmax(counts)]) if len(opens) else 0
+
+def _intraday_buckets(index: pd.DatetimeIndex, minutes: int, open_ns: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bucket start of every bar, as (wall-clock ns, UTC ns). Widths that
+    divide 30 minutes are aligned to the clock (15m bars at 9:30, 9:45,
+    ...); 90m buckets are anchored at the session open, open_ns after
+    midnight (9:30, 11:00, ...).
+    """
+    local = _local_ns(index)
+    width = minutes * _MINUTE_NS
+    anchor = local // _DAY_NS * _DAY_NS
+    if 30 % minutes:
+        anchor = anchor + open_ns
+    buckets = anchor + (local - anchor) // width * width
+    return buckets, index.asi8 - (local - buckets)
+
+def _calendar_day_ns(day: int, tz) -> int:
+    """Local midnight of a day (days since the epoch) as UTC nanoseconds."""
+    midnight = pd.Timestamp(np.datetime64(day, "D"))
+    if tz is not None:
+        midnight = midnight.tz_localize(tz, ambiguous=False, nonexistent="shift_forward")
+    return midnight.value
+
+def bucket_bounds(interval: str, tz, start: Optional[int], end: Optional[int], open_ns: int = 0) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Widen a [start, end) range of UTC nanoseconds out to whole `interval`
+    buckets, so the first and last derived bars are aggregated from every
+    base bar they cover.
+    """
+    def locate(value: int) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex([value], tz="UTC")
+        return index.tz_convert(tz) if tz is not None else index.tz_localize(None)
+
+    if interval in _BUCKET_MINUTES:
+        width = _BUCKET_MINUTES[interval] * _MINUTE_NS
+        if start is not None:
+            start = int(_intraday_buckets(locate(start), _BUCKET_MINUTES[interval], open_ns)[1][0])
+        if end is not None:
+            end = int(_intraday_buckets(locate(end - 1), _BUCKET_MINUTES[interval], open_ns)[1][0]) + width
+        return start, end
+    if start is not None:
+        start = _calendar_day_ns(int(_calendar_buckets(locate(start), interval)[0]), tz)
+    if end is not None:
+        first = int(_calendar_buckets(locate(end - 1), interval)[0])
+        if interval == "1wk":
+            following = first + 7
+        else:
+            month = np.datetime64(first, "D").astype("datetime64[M]") + (3 if interval == "3mo" else 1)
+            following = int(month.astype("datetime64[D]").astype(np.int64))
+        end = _calendar_day_ns(following, tz)
+    return start, end
+
+def _calendar_buckets(index: pd.DatetimeIndex, interval: str) -> np.ndarray:
+    """Bucket start day of every daily bar: Mondays, first of month or quarter."""
+    days = _local_ns(index) // _DAY_NS
+    if interval == "1wk":
+        # 1970-01-01 was a Thursday
+        return days - (days + 3) % 7
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if interval == "3mo":
+        months = months - months % 3
+    return months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+def _aggregate(name: str, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    ends = np.r_[starts[1:], len(values)] - 1
+    if name == "Open":
+        return values[starts]
+    if name == "High":
+        return np.fmax.reduceat(values, starts)
+    if name == "Low":
+        return np.fmin.reduceat(values, starts)
+    if name in ("Close", "Adj Close"):
+        return values[ends]
+    if name == "Stock Splits":
+        ratios = np.multiply.reduceat(np.where(values > 0, values, 1.0), starts)
+        return np.where(ratios != 1.0, ratios, 0.0)
+    # Volume, Dividends, Capital Gains
+    summed = np.add.reduceat(np.nan_to_num(values), starts)
+    return summed.astype(values.dtype, copy=False)
+
+def resample_bars(bars: ColumnFrame, interval: str, open_ns: int = 0) -> ColumnFrame:
+    """
+    Aggregate bars of a base interval into `interval` bars in one vectorized
+    pass: first open, max high, min low, last close, summed volume and
+    dividends, and the combined split ratio. open_ns is the session open
+    that 90m buckets are anchored at (see session_open).
+    """
+    index = bars.index
+    if not len(index):
+        return bars
+    if interval in _BUCKET_MINUTES:
+        buckets, labels_utc = _intraday_buckets(index, _BUCKET_MINUTES[interval], open_ns)
+    else:
+        buckets = _calendar_buckets(index, interval)
+        labels_utc = None
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+    if labels_utc is not None:
+        labels = pd.DatetimeIndex(labels_utc[starts].view("datetime64[ns]"), tz="UTC").tz_convert(index.tz)
+    else:
+        labels = pd.DatetimeIndex(buckets[starts].astype("datetime64[D]")).tz_localize(
+            index.tz, ambiguous=False, nonexistent="shift_forward"
+        )
+    data = {name: _aggregate(name, bars[name], starts) for name in bars.columns}
+    return ColumnFrame(labels.rename(index.name), data)
+
+def round_prices(bars: ColumnFrame) -> ColumnFrame:
+    """Round prices to 2 decimals, as yfinance's rounding=True does."""
+    prices = ("Open", "High", "Low", "Close", "Adj Close")
+    data = {
+        name: np.round(values, 2) if name in prices else values
+        for name, values in bars.data.items()
+    }
+    return ColumnFrame(bars.index, data)
@@ -0,0 +1,507 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import HISTORY_STORE_DIR, HISTORY_STORE_ENABLED, HISTORY_STORE_INTERVALS
+from app.services.history import (
+    DERIVED_INTERVALS,
+    INTERVAL_LIMITS,
+    bucket_bounds,
+    can_derive,
+    fetch_history,
+    history_key_params,
+    is_intraday,
+    period_start,
+    plan_windows,
+    resample_bars,
+    round_prices,
+    session_open,
+)
+from app.utils.cache import get_or_load, ttl_for
+from app.utils.executor import run_blocking
+from app.utils.gateway import UpstreamUnavailable
+from app.utils.prefetch import prefetcher
+from app.utils.serializers import ColumnFrame
+from app.utils.singleflight import flights
+from app.utils.ticker_registry import new_ticker
+
+logger = logging.getLogger(__name__)
+
+# yfinance column -> stored column (and file) name
+COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Adj Close": "adj_close",
+    "Volume": "volume",
+    "Dividends": "dividends",
+    "Stock Splits": "stock_splits",
+    "Capital Gains": "capital_gains",
+}
+_SYMBOL = re.compile(r"[A-Za-z0-9.^=_-]{1,32}")
+_PRICES = ("open", "high", "low", "close", "adj_close")
+_EVENTS = ("dividends", "stock_splits", "capital_gains")
+
+def storable(symbol: str) -> bool:
+    """
+    Whether a symbol can name a store directory: nothing that could leave
+    the partition (or name it, like "." and ".."). Others, e.g. "M&M.NS",
+    are valid tickers but are served from Yahoo instead of the store.
+    """
+    return bool(_SYMBOL.fullmatch(symbol)) and ".." not in symbol and bool(symbol.strip("."))
+
+def _new_version() -> str:
+    """Version directory names sort by creation time."""
+    return f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+def _version_order(version: str) -> Tuple[int, str]:
+    # Versions written before names were time-ordered sort first
+    head = version.split("-", 1)[0]
+    return (int(head), version) if head.isdigit() and len(head) == 20 else (-1, version)
+
+@dataclass
+class StoredSeries:
+    """
+    Bars of one symbol and interval as columns, in timestamp order. Prices
+    are stored as Yahoo serves them with auto_adjust=False (split-adjusted
+    OHLC plus Adj Close); dividend adjustment is applied when reading.
+    """
+
+    timestamps: np.ndarray  # int64 nanoseconds since the epoch (UTC)
+    columns: Dict[str, np.ndarray]
+    tz: str
+    index_name: str
+    refreshed_at: float = 0.0
+    version: str = field(default_factory=_new_version)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, index_name: str) -> "StoredSeries":
+        columns = {
+            name: frame[column].to_numpy(dtype=float)
+            for column, name in COLUMNS.items() if column in frame.columns
+        }
+        return cls(
+            timestamps=frame.index.as_unit("ns").asi8.copy(),
+            columns=columns,
+            tz=str(frame.index.tz),
+            index_name=frame.index.name or index_name,
+        )
+
+    def index(self) -> pd.DatetimeIndex:
+        """The bar times in the exchange's timezone."""
+        return pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"), tz="UTC").tz_convert(self.tz)
+
+    def last_bar(self) -> datetime:
+        """The last bar's time as a naive datetime in the exchange's timezone."""
+        last = pd.Timestamp(self.timestamps[-1], tz="UTC").tz_convert(self.tz)
+        return last.tz_localize(None).to_pydatetime()
+
+    def slice(self, start: Optional[int], end: Optional[int], include_start: bool = True) -> "StoredSeries":
+        """Bars with start <= timestamp < end (start < timestamp when not include_start)."""
+        first = 0 if start is None else np.searchsorted(self.timestamps, start, side="left" if include_start else "right")
+        stop = len(self) if end is None else np.searchsorted(self.timestamps, end, side="left")
+        return StoredSeries(
+            timestamps=self.timestamps[first:stop],
+            columns={name: values[first:stop] for name, values in self.columns.items()},
+            tz=self.tz,
+            index_name=self.index_name,
+            refreshed_at=self.refreshed_at,
+            version=self.version,
+        )
+
+    def view(self, auto_adjust: bool = True, rounding: bool = False) -> ColumnFrame:
+        """
+        The columns Ticker.history() would return for these bars. Stored
+        columns are handed out as-is (views into the memory-mapped files);
+        only adjusted or rounded prices are computed, over this slice alone.
+        """
+        columns = self.columns
+        data = {}
+        if auto_adjust:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(columns["close"] != 0, columns["adj_close"] / columns["close"], 1.0)
+            data["Open"] = columns["open"] * ratio
+            data["High"] = columns["high"] * ratio
+            data["Low"] = columns["low"] * ratio
+            data["Close"] = columns["adj_close"]
+        else:
+            for name in _PRICES:
+                data[_column_name(name)] = columns[name]
+        if rounding:
+            data = {name: np.round(values, 2) for name, values in data.items()}
+        data["Volume"] = columns["volume"]
+        for name in _EVENTS:
+            if name in columns:
+                data[_column_name(name)] = columns[name]
+        return ColumnFrame(self.index().rename(self.index_name), data)
+
+    def to_frame(self, auto_adjust: bool = True, rounding: bool = False) -> pd.DataFrame:
+        """Rebuild the DataFrame Ticker.history() would return for these bars."""
+        return self.view(auto_adjust, rounding).to_frame()
+
+def _column_name(name: str) -> str:
+    return next(column for column, stored in COLUMNS.items() if stored == name)
+
+def _blank(name: str, length: int) -> np.ndarray:
+    """Fill for a column a series did not have: no events, unknown values."""
+    return np.zeros(length) if name in _EVENTS else np.full(length, np.nan)
+
+def merge_tail(stored: Optional[StoredSeries], tail: StoredSeries) -> StoredSeries:
+    """
+    Replace stored bars from the tail's first timestamp on with the tail.
+
+    Yahoo re-adjusts the whole history when a dividend or split happens, so
+    for each event in the tail that is not already on file, the kept bars
+    are adjusted the same way: a split divides prices and dividends and
+    multiplies volume by its ratio, and a dividend scales Adj Close by
+    (1 - dividend / previous close).
+    """
+    if stored is None or not len(stored):
+        return tail
+    cut = int(np.searchsorted(stored.timestamps, tail.timestamps[0], side="left"))
+    names = list(dict.fromkeys([*stored.columns, *tail.columns]))
+    kept = {
+        name: stored.columns[name][:cut].astype(float) if name in stored.columns else _blank(name, cut)
+        for name in names
+    }
+    added = {
+        name: tail.columns[name].astype(float) if name in tail.columns else _blank(name, len(tail))
+        for name in names
+    }
+
+    def is_new(name: str, position: int) -> bool:
+        value = added[name][position]
+        timestamp = tail.timestamps[position]
+        on_file = int(np.searchsorted(stored.timestamps, timestamp))
+        return not (
+            on_file < len(stored)
+            and stored.timestamps[on_file] == timestamp
+            and stored.columns.get(name, np.zeros(len(stored)))[on_file] == value
+        )
+
+    if cut:
+        # Splits first: tail dividends and closes are already split-adjusted
+        for position in np.flatnonzero(added["stock_splits"] > 0):
+            if is_new("stock_splits", position):
+                ratio = added["stock_splits"][position]
+                for name in _PRICES:
+                    kept[name] /= ratio
+                kept["volume"] *= ratio
+                kept["dividends"] /= ratio
+        for position in np.flatnonzero(added["dividends"] > 0):
+            if is_new("dividends", position):
+                previous_close = added["close"][position - 1] if position else kept["close"][-1]
+                if previous_close and not np.isnan(previous_close):
+                    kept["adj_close"] *= 1 - added["dividends"][position] / previous_close
+
+    return StoredSeries(
+        timestamps=np.concatenate([stored.timestamps[:cut], tail.timestamps]),
+        columns={name: np.concatenate([kept[name], added[name]]) for name in names},
+        tz=stored.tz,
+        index_name=stored.index_name,
+    )
+
+def _read_series(path: str) -> Optional[StoredSeries]:
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    directory = os.path.join(path, meta["version"])
+
+    def mapped(name: str) -> np.ndarray:
+        # Pages are shared with every process reading the same series; asarray
+        # drops the memmap subclass (which orjson does not encode) without copying
+        return np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+
+    return StoredSeries(
+        timestamps=mapped("timestamps"),
+        columns={name: mapped(name) for name in meta["columns"]},
+        tz=meta["tz"],
+        index_name=meta["index_name"],
+        refreshed_at=meta["refreshed_at"],
+        version=meta["version"],
+    )
+
+def load_series(path: str, attempts: int = 3) -> Optional[StoredSeries]:
+    for _ in range(attempts - 1):
+        try:
+            return _read_series(path)
+        except FileNotFoundError:
+            # A writer replaced the version between reading meta.json and its files
+            continue
+    return _read_series(path)
+
+def _meta_version(path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            return json.load(f)["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _write_meta(path: str, series: StoredSeries):
+    meta = {
+        "version": series.version,
+        "tz": series.tz,
+        "index_name": series.index_name,
+        "columns": list(series.columns),
+        "rows": len(series),
+        "refreshed_at": series.refreshed_at,
+    }
+    temporary_path = os.path.join(path, f"meta.json.{uuid.uuid4().hex}.tmp")
+    with open(temporary_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(temporary_path, os.path.join(path, "meta.json"))
+
+def save_series(path: str, series: StoredSeries, data_changed: bool = True, base_version: Optional[str] = None):
+    """
+    Write a series as one .npy file per column into a new version directory,
+    then switch meta.json to it atomically. Readers never see a partly
+    written version.
+
+    Several processes may top up the same series at once. meta.json is
+    switched, and superseded versions removed, under a lock on the series
+    directory: meta.json never moves back to an older version, and only
+    versions up to base_version (the one this write started from), or this
+    write's own if a newer one won, are removed. A version another writer
+    is still filling is never deleted under it.
+    """
+    os.makedirs(path, exist_ok=True)
+    if data_changed:
+        series.version = _new_version()
+        directory = os.path.join(path, series.version)
+        os.makedirs(directory)
+        np.save(os.path.join(directory, "timestamps.npy"), series.timestamps)
+        for name, values in series.columns.items():
+            if name == "volume" and np.isfinite(values).all():
+                values = values.astype(np.int64)
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+    with open(os.path.join(path, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        current = _meta_version(path)
+        if current is None or _version_order(series.version) >= _version_order(current):
+            _write_meta(path, series)
+            current = series.version
+        for entry in os.listdir(path):
+            if entry == current or not os.path.isdir(os.path.join(path, entry)):
+                continue
+            # A version newer than the one read may still be being written
+            older = base_version is not None and _version_order(entry) <= _version_order(base_version)
+            if older or entry == series.version:
+                shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+
+def _fetch_bars(symbol: str, interval: str, prepost: bool, start: Optional[datetime]) -> pd.DataFrame:
+    """Raw bars from `start` (exchange time) to now; everything Yahoo has if start is None."""
+    ticker = new_ticker(symbol)
+    options = dict(interval=interval, prepost=prepost, auto_adjust=False, actions=True)
+    if start is None and INTERVAL_LIMITS[interval][1] is None:
+        return ticker.history(period="max", **options)
+    frames = [
+        ticker.history(start=window_start, end=window_end, **options)
+        for window_start, window_end in plan_windows(interval, start, None, datetime.utcnow())
+    ]
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    frame = pd.concat(frames)
+    return frame[~frame.index.duplicated(keep="last")]
+
+class HistoryStore:
+    """
+    On-disk bar store behind /history, partitioned by interval (and prepost)
+    and symbol. A series is topped up with only the bars since its last
+    stored bar, at most once per `max_age` seconds; requests are sliced from
+    the stored series, and coarser intervals are resampled from their base
+    interval instead of being fetched.
+    """
+
+    # Series kept mapped in this process, least recently used first
+    max_open = 1024
+
+    def __init__(self, root: str, intervals: List[str], enabled: bool = True):
+        self.root = root
+        self.intervals = set(intervals) & set(INTERVAL_LIMITS)
+        self.enabled = enabled
+        self.max_age = ttl_for("history")
+        self._mapped: "OrderedDict[str, Tuple[Tuple[int, int], StoredSeries]]" = OrderedDict()
+        # _open runs in worker threads; series are loaded outside the lock
+        self._mapped_lock = threading.Lock()
+
+    def supports(self, symbol: str, params) -> bool:
+        """Whether a request can be answered from stored raw bars."""
+        if not storable(symbol):
+            return False
+        interval = params.interval
+        if interval not in self.intervals:
+            if not can_derive(interval, bool(params.prepost)) or DERIVED_INTERVALS[interval] not in self.intervals:
+                return False
+        return (
+            self.enabled
+            and not params.repair
+            and not params.back_adjust
+            and not params.keepna
+        )
+
+    def _path(self, symbol: str, interval: str, prepost: bool) -> str:
+        # Callers check supports() first; this guards the directory name
+        if not storable(symbol):
+            raise ValueError(f"Invalid symbol: {symbol!r}")
+        partition = f"{interval}-prepost" if prepost and is_intraday(interval) else interval
+        return os.path.join(self.root, partition, symbol)
+
+    def _open(self, path: str) -> Optional[StoredSeries]:
+        """The series at path, mapped again only when its meta.json was replaced."""
+        try:
+            stat = os.stat(os.path.join(path, "meta.json"))
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        with self._mapped_lock:
+            cached = self._mapped.get(path)
+            if cached is not None and cached[0] == stamp:
+                self._mapped.move_to_end(path)
+                return cached[1]
+        series = load_series(path)
+        if series is not None:
+            with self._mapped_lock:
+                self._mapped[path] = (stamp, series)
+                self._mapped.move_to_end(path)
+                while len(self._mapped) > self.max_open:
+                    self._mapped.popitem(last=False)
+        return series
+
+    def _open_readable(self, path: str) -> Optional[StoredSeries]:
+        """The series at path, or None if it is missing or cannot be read."""
+        try:
+            return self._open(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Stored series %s is unreadable, fetching it again: %s", path, e)
+            return None
+
+    async def series(self, symbol: str, interval: str, prepost: bool = False) -> StoredSeries:
+        """The stored series, topped up from Yahoo first if it is stale."""
+        path = self._path(symbol, interval, prepost)
+        series = await asyncio.to_thread(self._open_readable, path)
+        if series is not None and time.time() - series.refreshed_at < self.max_age:
+            return series
+        try:
+            return await flights.do(
+                f"history_store:{path}",
+                lambda: self._update(symbol, interval, prepost, path),
+            )
+        except UpstreamUnavailable:
+            # Serve the stored bars, stale, until Yahoo answers again
+            if series is None:
+                raise
+            return series
+
+    async def refresh(self, symbol: str, interval: str, prepost: bool = False) -> StoredSeries:
+        """Top up the stored series from Yahoo now, even if it is still fresh."""
+        path = self._path(symbol, interval, prepost)
+        series = await flights.do(
+            f"history_store:{path}",
+            lambda: self._update(symbol, interval, prepost, path, force=True),
+        )
+        prefetcher.stored(f"history_store:{path}", series.refreshed_at + self.max_age)
+        return series
+
+    async def _update(self, symbol: str, interval: str, prepost: bool, path: str, force: bool = False) -> StoredSeries:
+        series = await asyncio.to_thread(self._open_readable, path)
+        if not force and series is not None and time.time() - series.refreshed_at < self.max_age:
+            return series
+        start = series.last_bar() if series is not None and len(series) else None
+        base_version = series.version if series is not None else None
+        frame = await run_blocking("ticker", _fetch_bars, symbol, interval, prepost, start)
+        if frame.empty:
+            if series is None:
+                raise ValueError(f"No data found for {symbol}")
+            series.refreshed_at = time.time()
+            await asyncio.to_thread(save_series, path, series, False, base_version)
+        else:
+            logger.debug("Stored %d %s bars of %s from %s", len(frame), interval, symbol, start or "the beginning")
+            index_name = "Datetime" if is_intraday(interval) else "Date"
+            series = merge_tail(series, StoredSeries.from_frame(frame, index_name))
+            series.refreshed_at = time.time()
+            await asyncio.to_thread(save_series, path, series, True, base_version)
+        # Serve the written files, mapped, rather than the merged arrays
+        return await asyncio.to_thread(self._open, path)
+
+    def _bounds(self, series: StoredSeries, params):
+        """(start, end, include_start) in epoch nanoseconds, following yfinance's rules."""
+        def to_ns(value) -> int:
+            return pd.Timestamp(value).tz_localize(series.tz).value
+
+        end = to_ns(params.end) if params.end else None
+        if params.start:
+            return to_ns(params.start), end, True
+        if not params.period:
+            return None, end, True
+        # Periods count back from the latest stored bar
+        start = period_start(params.period, series.last_bar())
+        return (to_ns(start) if start else None), end, False
+
+    async def get(self, symbol: str, params) -> ColumnFrame:
+        """
+        The requested bars, found by binary search on the mapped timestamps
+        and handed out as views; nothing outside the slice is read. Derived
+        intervals are aggregated from the slice of their base interval.
+        """
+        interval = params.interval
+        base = interval if interval in self.intervals else DERIVED_INTERVALS[interval]
+        symbol, prepost = symbol.upper(), bool(params.prepost)
+        series = await self.series(symbol, base, prepost)
+        prefetcher.track(
+            "history", f"history_store:{self._path(symbol, base, prepost)}",
+            lambda: self.refresh(symbol, base, prepost),
+            series.refreshed_at + self.max_age,
+        )
+        if base == interval:
+            if len(series):
+                series = series.slice(*self._bounds(series, params))
+            return series.view(params.auto_adjust, params.rounding)
+        open_ns = 0
+        if len(series):
+            if interval == "90m":
+                # Anchored at the exchange's regular open, seen over the whole series
+                open_ns = session_open(series.index())
+            start, end, _ = self._bounds(series, params)
+            # Whole buckets only: the first and last bars aggregate every base bar they cover
+            start, end = bucket_bounds(interval, series.tz, start, end, open_ns)
+            series = series.slice(start, end)
+        # Adjust the base bars first, so a dividend inside a bucket is exact
+        bars = resample_bars(series.view(params.auto_adjust), interval, open_ns)
+        return round_prices(bars) if params.rounding else bars
+
+history_store = HistoryStore(HISTORY_STORE_DIR, HISTORY_STORE_INTERVALS, HISTORY_STORE_ENABLED)
+
+async def load_history(symbol: str, params):
+    """
+    History for /history and everything built on it: from the local store
+    when it can answer, otherwise from Yahoo through the response cache.
+    Returns a DataFrame or, from the store, a ColumnFrame.
+    """
+    if history_store.supports(symbol, params):
+        # Served from the local store, which only fetches the missing tail
+        return await history_store.get(symbol, params)
+    return await get_or_load(
+        "history", symbol, history_key_params(params),
+        lambda: run_blocking("ticker", fetch_history, symbol, params),
+    )
@@ -0,0 +1,165 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.serializers import ColumnFrame
+
+# name -> (default arguments, number of arguments accepted)
+INDICATORS: Dict[str, Tuple[Tuple[float, ...], int]] = {
+    "sma": ((20,), 1),
+    "ema": ((20,), 1),
+    "rsi": ((14,), 1),
+    "macd": ((12, 26, 9), 3),
+    "bbands": ((20, 2), 2),
+    "vwap": ((), 1),
+}
+
+def parse_indicator(spec: str) -> Tuple[str, Tuple[float, ...]]:
+    """Parse "name" or "name:arg,arg" (e.g. "sma:50", "macd:12,26,9")."""
+    name, _, arguments = spec.strip().lower().partition(":")
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name} (expected one of {', '.join(INDICATORS)})")
+    defaults, accepted = INDICATORS[name]
+    values = tuple(float(value) for value in arguments.split(",") if value.strip()) if arguments else ()
+    if len(values) > accepted:
+        raise ValueError(f"{name} takes at most {accepted} argument(s)")
+    values = values + defaults[len(values):]
+    # Every argument but the Bollinger width is a bar count
+    windows = values[:1] if name == "bbands" else values
+    if any(value < 1 or value != int(value) for value in windows):
+        raise ValueError(f"{name} windows must be positive integers")
+    return name, values
+
+def _rolling_sum(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum and count of the non-NaN values in each trailing window, from cumulative sums."""
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    total = np.full(len(values), np.nan)
+    count = np.zeros(len(values), dtype=np.int64)
+    if window <= len(values):
+        total[window - 1:] = sums[window:] - sums[:-window]
+        count[window - 1:] = counts[window:] - counts[:-window]
+    return total, count
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    total, count = _rolling_sum(values, window)
+    with np.errstate(invalid="ignore"):
+        return np.where(count == window, total / window, np.nan)
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Population standard deviation of each full trailing window."""
+    # Shift by a typical value first, so the sum of squares keeps its precision
+    valid = values[~np.isnan(values)]
+    shifted = values - (valid[0] if len(valid) else 0.0)
+    total, count = _rolling_sum(shifted, window)
+    squares, _ = _rolling_sum(shifted * shifted, window)
+    with np.errstate(invalid="ignore"):
+        variance = np.maximum(squares / window - (total / window) ** 2, 0.0)
+    return np.where(count == window, np.sqrt(variance), np.nan)
+
+def _smooth(values: np.ndarray, window: int, alpha: float) -> np.ndarray:
+    """
+    Exponential smoothing seeded with the mean of the first `window` values
+    (the TA-Lib convention). The recursion runs in pandas' compiled ewm.
+    """
+    start = int(np.argmax(~np.isnan(values))) if (~np.isnan(values)).any() else len(values)
+    result = np.full(len(values), np.nan)
+    if len(values) - start < window:
+        return result
+    seeded = values[start + window - 1:].copy()
+    seeded[0] = values[start:start + window].mean()
+    result[start + window - 1:] = pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return result
+
+def ema(values: np.ndarray, window: int) -> np.ndarray:
+    return _smooth(values, window, 2.0 / (window + 1))
+
+def rsi(values: np.ndarray, window: int) -> np.ndarray:
+    """Wilder's RSI."""
+    change = np.diff(values, prepend=np.nan)
+    gains = _smooth(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), window, 1.0 / window)
+    losses = _smooth(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)), window, 1.0 / window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = gains / losses
+        return np.where(losses == 0, np.where(gains == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + strength))
+
+def macd(values: np.ndarray, fast: int, slow: int, signal: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    line = ema(values, fast) - ema(values, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+def _session_starts(index: pd.DatetimeIndex) -> np.ndarray:
+    """Position of the first bar of each bar's trading day."""
+    local = index.tz_localize(None) if index.tz is not None else index
+    days = local.asi8 // (24 * 60 * 60 * 1_000_000_000)
+    new_day = np.r_[True, days[1:] != days[:-1]]
+    return np.maximum.accumulate(np.where(new_day, np.arange(len(days)), 0))
+
+def vwap(high, low, close, volume, index: pd.DatetimeIndex, intraday: bool, window: int = 0) -> np.ndarray:
+    """
+    Volume-weighted average of the typical price: over a trailing window of
+    bars when given, else anchored at each session open for intraday bars
+    and at the first bar otherwise.
+    """
+    typical = (high + low + close) / 3.0
+    weighted = np.nan_to_num(typical * volume)
+    volume = np.nan_to_num(volume.astype(float))
+    if window:
+        numerator, _ = _rolling_sum(weighted, window)
+        denominator, _ = _rolling_sum(volume, window)
+    else:
+        numerator = np.cumsum(weighted)
+        denominator = np.cumsum(volume)
+        if intraday and len(index):
+            # Restart both sums at every session open
+            starts = _session_starts(index)
+            numerator = numerator - np.concatenate(([0.0], numerator))[starts]
+            denominator = denominator - np.concatenate(([0.0], denominator))[starts]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+def _label(name: str, arguments: Tuple[float, ...]) -> str:
+    return "_".join([name.upper()] + [f"{value:g}" for value in arguments])
+
+def compute_indicators(history, specs: List[str], intraday: bool) -> ColumnFrame:
+    """
+    Compute the requested indicators over a history frame (DataFrame or
+    ColumnFrame) and return only the indicator columns, on its index.
+    """
+    def column(name: str) -> np.ndarray:
+        return np.asarray(history[name], dtype=float)
+
+    close = column("Close")
+    data: Dict[str, np.ndarray] = {}
+    for spec in specs:
+        name, arguments = parse_indicator(spec)
+        label = _label(name, arguments)
+        windows = [int(value) for value in arguments]
+        if name == "sma":
+            data[label] = sma(close, windows[0])
+        elif name == "ema":
+            data[label] = ema(close, windows[0])
+        elif name == "rsi":
+            data[label] = rsi(close, windows[0])
+        elif name == "macd":
+            line, signal_line, histogram = macd(close, *windows)
+            suffix = label[len("MACD"):]
+            data[label] = line
+            data[f"MACD_signal{suffix}"] = signal_line
+            data[f"MACD_hist{suffix}"] = histogram
+        elif name == "bbands":
+            window, width = windows[0], arguments[1]
+            middle = sma(close, window)
+            spread = width * rolling_std(close, window)
+            suffix = label[len("BBANDS"):]
+            data[f"BB_middle{suffix}"] = middle
+            data[f"BB_upper{suffix}"] = middle + spread
+            data[f"BB_lower{suffix}"] = middle - spread
+        elif name == "vwap":
+            data[label] = vwap(
+                column("High"), column("Low"), close, column("Volume"),
+                history.index, intraday, windows[0] if windows else 0,
+            )
+    return ColumnFrame(history.index, data)
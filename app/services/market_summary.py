@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import MARKET_INDICES
+from app.utils.cache import cache_set, get_or_load, ttl_for
+from app.utils.executor import run_blocking
+from app.utils.serializers import fast_info_to_dict
+from app.utils.ticker_registry import new_ticker
+
+logger = logging.getLogger(__name__)
+
+# Only the FastInfo fields computed from the price history; reading shares
+# or market cap would cost extra upstream calls and is meaningless for indices
+_QUOTE_KEYS = [
+    "lastPrice",
+    "regularMarketPreviousClose",
+    "open",
+    "dayHigh",
+    "dayLow",
+    "lastVolume",
+]
+
+def _fetch_index_quote(symbol: str, name: str) -> Dict[str, Any]:
+    ticker = new_ticker(symbol)
+    quote = fast_info_to_dict(ticker.fast_info, _QUOTE_KEYS)
+    metadata = ticker.history_metadata or {}
+
+    price = quote["lastPrice"]
+    previous_close = quote["regularMarketPreviousClose"]
+    change = None
+    change_percent = None
+    if price is not None and previous_close:
+        change = price - previous_close
+        change_percent = change / previous_close * 100
+
+    return {
+        "shortName": name,
+        "regularMarketPrice": price,
+        "regularMarketChange": change,
+        "regularMarketChangePercent": change_percent,
+        "regularMarketTime": metadata.get("regularMarketTime"),
+        "marketCap": None,
+        "regularMarketVolume": quote["lastVolume"],
+        "regularMarketDayHigh": quote["dayHigh"],
+        "regularMarketDayLow": quote["dayLow"],
+        "regularMarketOpen": quote["open"],
+        "regularMarketPreviousClose": previous_close,
+    }
+
+class MarketSummaryService:
+    """
+    Keeps a snapshot of index quotes for each region that has been asked
+    for. A background task calls refresh() more often than the snapshot's
+    TTL, so readers are answered from memory without waiting on Yahoo.
+    """
+
+    def __init__(self, indices: Dict[str, Dict[str, str]]):
+        self.indices = indices
+        self.max_age = ttl_for("market_summary")
+        self._snapshots: Dict[str, Tuple[Dict[str, Any], float]] = {}
+
+    def has_region(self, region: str) -> bool:
+        return region in self.indices
+
+    async def _fetch(self, region: str) -> Dict[str, Any]:
+        """
+        Fetch every index of a region concurrently. An index that fails keeps
+        its quote from the last snapshot; if every index fails, the first
+        error is raised rather than an empty or stale summary returned.
+        """
+        indices = self.indices[region]
+        quotes = await asyncio.gather(
+            *[run_blocking("market", _fetch_index_quote, symbol, name) for symbol, name in indices.items()],
+            return_exceptions=True,
+        )
+        errors = [quote for quote in quotes if isinstance(quote, BaseException)]
+        if errors and len(errors) == len(quotes):
+            raise errors[0]
+        snapshot = self._snapshots.get(region)
+        previous = snapshot[0] if snapshot is not None else {}
+        data = {}
+        for symbol, quote in zip(indices, quotes):
+            if not isinstance(quote, BaseException):
+                data[symbol] = quote
+            elif symbol in previous:
+                data[symbol] = previous[symbol]
+        return data
+
+    async def get(self, region: str) -> Dict[str, Any]:
+        snapshot = self._snapshots.get(region)
+        if snapshot is not None and time.monotonic() - snapshot[1] < self.max_age:
+            return snapshot[0]
+        data = await get_or_load("market_summary", None, {"region": region}, lambda: self._fetch(region))
+        self._snapshots[region] = (data, time.monotonic())
+        return data
+
+    async def refresh(self, region: Optional[str] = None):
+        """Refresh the given region, or every region that has a snapshot."""
+        regions = [region] if region else list(self._snapshots) or ["US"]
+        for region in regions:
+            try:
+                data = await self._fetch(region)
+            except Exception as e:
+                # Every index failed: keep serving the current snapshot
+                logger.warning("Market summary refresh for %s failed: %s", region, e)
+                continue
+            self._snapshots[region] = (data, time.monotonic())
+            await cache_set("market_summary", None, {"region": region}, data)
+
+market_summary = MarketSummaryService(MARKET_INDICES)
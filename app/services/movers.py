@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.config import BATCH_HISTORY_CHUNK_SIZE, MARKET_UNIVERSE_FILE
+from app.services.universe import load_symbols
+from app.utils.download import download
+from app.utils.executor import run_blocking
+
+@dataclass
+class QuoteTable:
+    """Columnar snapshot of the latest daily quote of every universe symbol."""
+
+    symbols: np.ndarray
+    price: np.ndarray
+    change: np.ndarray
+    change_percent: np.ndarray
+    volume: np.ndarray
+    updated_at: datetime
+
+    def rows(self, positions: np.ndarray) -> List[Dict[str, Any]]:
+        return [
+            {
+                "symbol": self.symbols[i],
+                "regularMarketPrice": _to_float(self.price[i]),
+                "regularMarketChange": _to_float(self.change[i]),
+                "regularMarketChangePercent": _to_float(self.change_percent[i]),
+                "regularMarketVolume": None if np.isnan(self.volume[i]) else int(self.volume[i]),
+            }
+            for i in positions
+        ]
+
+def _to_float(value) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+def top_n(values: np.ndarray, count: int) -> np.ndarray:
+    """Positions of the `count` largest non-NaN values, largest first."""
+    valid = np.flatnonzero(~np.isnan(values))
+    count = min(count, len(valid))
+    if count <= 0:
+        return valid[:0]
+    candidates = values[valid]
+    part = np.argpartition(-candidates, count - 1)[:count]
+    order = part[np.argsort(-candidates[part], kind="stable")]
+    return valid[order]
+
+def _download_quotes(symbols: List[str]) -> pd.DataFrame:
+    """Download the last few daily bars; returns (Close, Volume) by symbol."""
+    data, _ = download(symbols, period="5d", interval="1d", group_by="column", auto_adjust=False)
+    closes = data["Close"]
+    volumes = data["Volume"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(symbols[0])
+        volumes = volumes.to_frame(symbols[0])
+    return pd.concat({"Close": closes, "Volume": volumes}, axis=1)
+
+class MoversService:
+    """
+    Keeps a QuoteTable for a fixed universe of symbols, rebuilt in the
+    background, and answers gainers/losers/most active from memory.
+    """
+
+    def __init__(self, universe_file: str):
+        self.universe_file = universe_file
+        self._symbols: Optional[List[str]] = None
+        self.table: Optional[QuoteTable] = None
+
+    @property
+    def symbols(self) -> List[str]:
+        if self._symbols is None:
+            self._symbols = load_symbols(self.universe_file)
+        return self._symbols
+
+    async def refresh(self):
+        symbols = self.symbols
+        frames = []
+        for start in range(0, len(symbols), BATCH_HISTORY_CHUNK_SIZE):
+            chunk = symbols[start:start + BATCH_HISTORY_CHUNK_SIZE]
+            frames.append(await run_blocking("market", _download_quotes, chunk))
+        data = pd.concat(frames, axis=1)
+
+        closes = data["Close"].ffill()
+        if len(closes) < 2:
+            return
+        volumes = data["Volume"]
+        price = closes.iloc[-1].to_numpy(dtype=float)
+        previous = closes.iloc[-2].to_numpy(dtype=float)
+        change = price - previous
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_percent = np.where(previous != 0, change / previous * 100, np.nan)
+
+        self.table = QuoteTable(
+            symbols=closes.columns.to_numpy(dtype=object),
+            price=price,
+            change=change,
+            change_percent=change_percent,
+            volume=volumes.iloc[-1].reindex(closes.columns).to_numpy(dtype=float),
+            updated_at=datetime.now(timezone.utc),
+        )
+
+    def _select(self, column: str, count: int, smallest: bool = False) -> Optional[Dict[str, Any]]:
+        table = self.table
+        if table is None:
+            return None
+        values = getattr(table, column)
+        if smallest:
+            values = -values
+        return {
+            "movers": table.rows(top_n(values, count)),
+            "updated_at": table.updated_at.isoformat(),
+        }
+
+    def gainers(self, count: int) -> Optional[Dict[str, Any]]:
+        return self._select("change_percent", count)
+
+    def losers(self, count: int) -> Optional[Dict[str, Any]]:
+        return self._select("change_percent", count, smallest=True)
+
+    def most_active(self, count: int) -> Optional[Dict[str, Any]]:
+        return self._select("volume", count)
+
+movers = MoversService(MARKET_UNIVERSE_FILE)
@@ -0,0 +1,14 @@
+from app.utils.cache import get_or_load
+from app.utils.executor import run_blocking
+from app.utils.serializers import fast_info_to_dict
+from app.utils.ticker_registry import new_ticker
+
+def fetch_fast_info(symbol: str):
+    return fast_info_to_dict(new_ticker(symbol).fast_info)
+
+async def load_fast_info(symbol: str):
+    """A ticker's fast_info, through the response cache."""
+    return await get_or_load(
+        "fast_info", symbol, None,
+        lambda: run_blocking("ticker", fetch_fast_info, symbol),
+    )
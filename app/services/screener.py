@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import FUND_UNIVERSE_FILE, SCREENER_UNIVERSE_FILE, STORAGE_DIR
+from app.services.universe import load_symbols
+from app.utils.cache import get_or_load
+from app.utils.executor import run_blocking
+from app.utils.ticker_registry import new_ticker
+
+logger = logging.getLogger(__name__)
+
+class ColumnarStore:
+    """
+    Immutable columnar table of per-symbol fields, indexed for screening.
+
+    Rows are kept in a fixed order (by `order_by` descending, then symbol),
+    so positions double as a stable pagination order. Range predicates use
+    pre-sorted value arrays and binary search; categorical predicates use
+    precomputed position arrays per (case-folded) value. Every predicate
+    becomes a boolean mask over the rows.
+    """
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        numeric: List[str],
+        categorical: List[str],
+        order_by: str,
+        updated_at: Optional[datetime] = None,
+    ):
+        frame = frame.copy()
+        for column in numeric:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype(float)
+        frame = frame.sort_values([order_by, "symbol"], ascending=[False, True], na_position="last", kind="stable")
+        self.frame = frame.reset_index(drop=True)
+        self.size = len(self.frame)
+        self.updated_at = updated_at or datetime.now(timezone.utc)
+        # Rows are immutable, so convert them for output once
+        records = self.frame.astype(object)
+        self._records = records.where(records.notna(), None).to_dict(orient="records")
+
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for column in numeric:
+            values = self.frame[column].to_numpy()
+            present = np.flatnonzero(~np.isnan(values))
+            order = present[np.argsort(values[present], kind="stable")]
+            self._sorted[column] = (values[order], order)
+
+        self._categories: Dict[str, Dict[str, np.ndarray]] = {}
+        for column in categorical:
+            keys = self.frame[column].fillna("").astype(str).str.casefold()
+            self._categories[column] = {
+                key: positions
+                for key, positions in keys.groupby(keys).indices.items()
+                if key
+            }
+
+    def all(self) -> np.ndarray:
+        return np.ones(self.size, dtype=bool)
+
+    def range_mask(self, column: str, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        """Rows whose value lies in [low, high]; rows without a value never match."""
+        values, order = self._sorted[column]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        stop = len(values) if high is None else np.searchsorted(values, high, side="right")
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[start:stop]] = True
+        return mask
+
+    def category_mask(self, column: str, value: str) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        positions = self._categories[column].get(value.casefold())
+        if positions is not None:
+            mask[positions] = True
+        return mask
+
+    def categories(self, column: str) -> List[str]:
+        """Distinct values of a categorical column, in their original case."""
+        values = self.frame[column].dropna().astype(str)
+        return sorted(values[values != ""].unique())
+
+    def page(self, mask: np.ndarray, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of matching rows and the total number of matches."""
+        positions = np.flatnonzero(mask)
+        offset = max(offset or 0, 0)
+        limit = max(limit or 0, 0)
+        rows = [self._records[i] for i in positions[offset:offset + limit]]
+        return rows, len(positions)
+
+def _fetch_info(symbol: str) -> Dict[str, Any]:
+    return new_ticker(symbol).info
+
+class SnapshotScreener:
+    """
+    Screens a periodically refreshed snapshot of Ticker.info fields for a
+    universe of symbols. The snapshot is persisted under STORAGE_DIR so a
+    restarted process can screen before its first refresh completes.
+
+    Subclasses define the fields to keep (each with the info keys to try, in
+    order), which of them are indexed, and how params become a mask.
+    """
+
+    name = "screener"
+    fields: Dict[str, Tuple[str, ...]] = {}
+    numeric: List[str] = []
+    categorical: List[str] = []
+    order_by = ""
+
+    def __init__(self, universe_file: str, storage_dir: Optional[str] = STORAGE_DIR):
+        self.universe_file = universe_file
+        self.snapshot_path = os.path.join(storage_dir, f"{self.name}.json") if storage_dir else None
+        self.store: Optional[ColumnarStore] = None
+
+    def _build(self, records: List[Dict[str, Any]], updated_at: Optional[datetime] = None) -> ColumnarStore:
+        frame = pd.DataFrame.from_records(records, columns=list(self.fields))
+        return ColumnarStore(frame, self.numeric, self.categorical, self.order_by, updated_at)
+
+    async def _load_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            # Shares cache entries with GET /api/ticker/{symbol}
+            return await get_or_load(
+                "info", symbol, None,
+                lambda: run_blocking("screener", _fetch_info, symbol),
+            )
+        except Exception:
+            return None
+
+    def _record(self, symbol: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        record = {}
+        for name, keys in self.fields.items():
+            record[name] = next((info[key] for key in keys if info.get(key) is not None), None)
+        record["symbol"] = symbol
+        return record
+
+    async def refresh(self):
+        symbols = load_symbols(self.universe_file)
+        infos = await asyncio.gather(*[self._load_info(symbol) for symbol in symbols])
+        records = [self._record(symbol, info) for symbol, info in zip(symbols, infos) if info]
+        if not records:
+            return
+        self.store = self._build(records)
+        await asyncio.to_thread(self._save_snapshot, records, self.store.updated_at)
+
+    def _save_snapshot(self, records: List[Dict[str, Any]], updated_at: datetime):
+        if not self.snapshot_path:
+            return
+        directory = os.path.dirname(self.snapshot_path)
+        os.makedirs(directory, exist_ok=True)
+        # A temporary file of its own, so concurrent saves (other workers,
+        # overlapping refreshes) never write into each other's file
+        fd, temporary_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.snapshot_path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"updated_at": updated_at.isoformat(), "records": records}, f, default=str)
+            os.replace(temporary_path, self.snapshot_path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    async def load_snapshot(self):
+        """Load the last persisted snapshot, if there is one."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            self.store = self._build(snapshot["records"], datetime.fromisoformat(snapshot["updated_at"]))
+        except Exception:
+            logger.exception("Could not load %s snapshot", self.name)
+
+    def _mask(self, store: ColumnarStore, params) -> np.ndarray:
+        raise NotImplementedError
+
+    def screen(self, params) -> Optional[Dict[str, Any]]:
+        store = self.store
+        if store is None:
+            return None
+        rows, total = store.page(self._mask(store, params), params.offset, params.limit)
+        return {
+            "results": rows,
+            "total": total,
+            "offset": params.offset,
+            "limit": params.limit,
+            "updated_at": store.updated_at.isoformat(),
+        }
+
+class EquityScreener(SnapshotScreener):
+    name = "equity_screener"
+    fields = {
+        "symbol": ("symbol",),
+        "shortName": ("shortName",),
+        "longName": ("longName",),
+        "sector": ("sector",),
+        "industry": ("industry",),
+        "country": ("country",),
+        "exchange": ("exchange",),
+        "currency": ("currency",),
+        "marketCap": ("marketCap",),
+        "dividendYield": ("dividendYield",),
+        "trailingPE": ("trailingPE",),
+        "regularMarketPrice": ("currentPrice", "regularMarketPrice"),
+    }
+    numeric = ["marketCap", "dividendYield"]
+    categorical = ["sector", "industry", "country", "exchange"]
+    order_by = "marketCap"
+
+    def _mask(self, store: ColumnarStore, params) -> np.ndarray:
+        mask = store.all()
+        if params.market_cap_min is not None or params.market_cap_max is not None:
+            mask &= store.range_mask("marketCap", params.market_cap_min, params.market_cap_max)
+        if params.dividend_yield_min is not None or params.dividend_yield_max is not None:
+            mask &= store.range_mask("dividendYield", params.dividend_yield_min, params.dividend_yield_max)
+        for column in ("sector", "industry", "country", "exchange"):
+            value = getattr(params, column)
+            if value:
+                mask &= store.category_mask(column, value)
+        return mask
+
+class FundScreener(SnapshotScreener):
+    name = "fund_screener"
+    fields = {
+        "symbol": ("symbol",),
+        "shortName": ("shortName",),
+        "longName": ("longName",),
+        "quoteType": ("quoteType",),
+        "category": ("category",),
+        "fundFamily": ("fundFamily",),
+        "expenseRatio": ("annualReportExpenseRatio", "netExpenseRatio"),
+        "netAssets": ("totalAssets", "netAssets"),
+        "yield": ("yield",),
+        "ytdReturn": ("ytdReturn",),
+        "currency": ("currency",),
+    }
+    numeric = ["expenseRatio", "netAssets"]
+    categorical = ["category", "fundFamily"]
+    order_by = "netAssets"
+
+    def _mask(self, store: ColumnarStore, params) -> np.ndarray:
+        mask = store.all()
+        if params.category:
+            mask &= store.category_mask("category", params.category)
+        if params.fund_family:
+            mask &= store.category_mask("fundFamily", params.fund_family)
+        if params.expense_ratio_min is not None or params.expense_ratio_max is not None:
+            mask &= store.range_mask("expenseRatio", params.expense_ratio_min, params.expense_ratio_max)
+        if params.net_assets_min is not None or params.net_assets_max is not None:
+            mask &= store.range_mask("netAssets", params.net_assets_min, params.net_assets_max)
+        return mask
+
+equity_screener = EquityScreener(SCREENER_UNIVERSE_FILE)
+fund_screener = FundScreener(FUND_UNIVERSE_FILE)
@@ -0,0 +1,282 @@
+import asyncio
+import bisect
+import csv
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import SEARCH_FUZZY_THRESHOLD, SEARCH_INDEX_FILE, SEARCH_LEARNED_MAX
+from app.utils.cache import get_or_load
+from app.utils.executor import run_blocking
+from app.utils.yahoo_session import yahoo
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("symbol", "name", "exchange", "type")
+
+SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+
+# Scores: an exact symbol beats a symbol prefix, which beats a name match,
+# which beats any fuzzy match (whose score is its trigram similarity)
+_EXACT_SYMBOL = 3.0
+_SYMBOL_PREFIX = 2.0
+_NAME_PREFIX = 1.0
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[0-9a-z]+", text.casefold())
+
+def _trigrams(text: str) -> List[str]:
+    padded = f"  {text} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+def edit_similarity(a: str, b: str) -> float:
+    """1 - optimal string alignment distance (edits and transpositions) / longer length."""
+    if not a or not b:
+        return 0.0
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return 1.0 - current[-1] / max(len(a), len(b))
+
+class TrigramIndex:
+    """
+    Postings of character trigrams, stored as one sorted array (CSR layout),
+    ranking entries by Dice similarity to a query.
+    """
+
+    def __init__(self, texts: List[str]):
+        self.vocabulary: Dict[str, int] = {}
+        rows, codes = [], []
+        self.sizes = np.zeros(len(texts), dtype=np.int32)
+        for row, text in enumerate(texts):
+            grams = _trigrams(text)
+            self.sizes[row] = len(grams)
+            for gram in grams:
+                codes.append(self.vocabulary.setdefault(gram, len(self.vocabulary)))
+                rows.append(row)
+        codes = np.asarray(codes, dtype=np.int32)
+        order = np.argsort(codes, kind="stable")
+        self.postings = np.asarray(rows, dtype=np.int32)[order]
+        self.offsets = np.searchsorted(codes[order], np.arange(len(self.vocabulary) + 1))
+
+    def similar(self, text: str, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows whose similarity to text reaches threshold, and their similarities."""
+        grams = _trigrams(text)
+        codes = [self.vocabulary[gram] for gram in grams if gram in self.vocabulary]
+        if not codes:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        candidates = np.concatenate([self.postings[self.offsets[code]:self.offsets[code + 1]] for code in codes])
+        shared = np.bincount(candidates, minlength=len(self.sizes))
+        rows = np.flatnonzero(shared)
+        scores = 2.0 * shared[rows] / (len(grams) + self.sizes[rows])
+        keep = scores >= threshold
+        return rows[keep], scores[keep]
+
+class SymbolTable:
+    """
+    Immutable lookup structures over a list of listings: sorted symbols and
+    sorted name words for prefix search (bisect), and trigram postings of
+    symbols and names for fuzzy matching.
+    """
+
+    def __init__(self, entries: List[Dict[str, str]]):
+        self.entries = entries
+        symbols = sorted((entry["symbol"], row) for row, entry in enumerate(entries))
+        self.symbols = [symbol for symbol, _ in symbols]
+        self.symbol_rows = np.asarray([row for _, row in symbols], dtype=np.int64)
+        words = sorted(
+            (word, row) for row, entry in enumerate(entries) for word in set(_words(entry["name"]))
+        )
+        self.words = [word for word, _ in words]
+        self.word_rows = np.asarray([row for _, row in words], dtype=np.int64)
+        self.name_words = [_words(entry["name"]) for entry in entries]
+        self.symbol_grams = TrigramIndex([entry["symbol"].casefold() for entry in entries])
+        self.name_grams = TrigramIndex([" ".join(words) for words in self.name_words])
+
+    @staticmethod
+    def _prefix_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+        return bisect.bisect_left(keys, prefix), bisect.bisect_left(keys, prefix + "\uffff")
+
+    def search(self, query: str, limit: int) -> Dict[int, float]:
+        """Scores of the rows whose symbol or name words start with the query, keyed by row."""
+        scores: Dict[int, float] = {}
+        symbol = query.strip().upper()
+        lower, upper = self._prefix_range(self.symbols, symbol)
+        for row, key in zip(self.symbol_rows[lower:upper], self.symbols[lower:upper]):
+            # Shorter completions of the typed prefix rank first
+            score = _EXACT_SYMBOL if key == symbol else _SYMBOL_PREFIX + len(symbol) / len(key)
+            scores[int(row)] = score
+
+        terms = _words(query)
+        if terms:
+            # Look up the most selective term, then require every term to
+            # prefix some word of the name
+            longest = max(terms, key=len)
+            lower, upper = self._prefix_range(self.words, longest)
+            for row in np.unique(self.word_rows[lower:upper])[:limit * 50]:
+                row = int(row)
+                words = self.name_words[row]
+                if all(any(word.startswith(term) for word in words) for term in terms):
+                    coverage = sum(map(len, terms)) / max(sum(map(len, words)), 1)
+                    scores[row] = max(scores.get(row, 0.0), _NAME_PREFIX + min(coverage, 1.0) * 0.99)
+        return scores
+
+    def fuzzy(self, query: str, limit: int, threshold: float) -> Dict[int, float]:
+        """
+        Scores of the rows whose symbol or name is similar to the query:
+        trigram similarity, with symbol candidates re-ranked by edit
+        distance so transpositions (MSTF for MSFT) rank well.
+        """
+        scores: Dict[int, float] = {}
+        symbol = query.strip().casefold()
+        rows, similarity = self.symbol_grams.similar(symbol, threshold)
+        best = np.argsort(-similarity, kind="stable")[:limit * 20]
+        for row, score in zip(rows[best].tolist(), similarity[best].tolist()):
+            edit = edit_similarity(symbol, self.entries[row]["symbol"].casefold())
+            scores[row] = max(score, edit)
+        name = " ".join(_words(query))
+        if name:
+            rows, similarity = self.name_grams.similar(name, threshold)
+            for row, score in zip(rows.tolist(), similarity.tolist()):
+                scores[row] = max(scores.get(row, 0.0), score)
+        return {row: score for row, score in scores.items() if score >= threshold}
+
+def _read_listing(path: str) -> List[Dict[str, str]]:
+    """Read a CSV listing with symbol, name, exchange and type columns; '#' lines are comments."""
+    with open(path, newline="") as f:
+        rows = csv.DictReader(line for line in f if not line.startswith("#"))
+        return _clean(rows)
+
+def _clean(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, str]]:
+    entries: Dict[str, Dict[str, str]] = {}
+    for row in rows:
+        symbol = (row.get("symbol") or "").strip().upper()
+        if symbol:
+            entries[symbol] = {field: (row.get(field) or "").strip() for field in FIELDS}
+            entries[symbol]["symbol"] = symbol
+    return list(entries.values())
+
+def search_quotes(query: str, limit: int, proxy: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Listings matching a query from Yahoo's search endpoint (yfinance 0.2.32 has no search API). Blocking."""
+    params = {"q": query, "quotesCount": limit, "newsCount": 0, "listsCount": 0, "enableFuzzyQuery": False}
+    data = yahoo.get_json(SEARCH_URL, params=params, proxy=proxy)
+    return data.get("quotes") or []
+
+def _format_upstream(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "symbol": item.get("symbol", ""),
+        "name": item.get("shortname") or item.get("longname") or "",
+        "exchange": item.get("exchange", ""),
+        "type": item.get("quoteType", ""),
+        "score": item.get("score", 0),
+    }
+
+class SymbolIndex:
+    """
+    In-memory symbol and name index built from a listing file. A query
+    that prefixes a known symbol or name words is answered locally; any
+    other goes upstream (through the response cache), and the listings it
+    returns are merged into the index. Fuzzy local matches follow the
+    upstream results, or stand in for them when Yahoo is unavailable.
+
+    The listing is re-read by refresh() when the file changes. Listings
+    learned from upstream are kept in a second, small table (the most
+    recent SEARCH_LEARNED_MAX of them) so merging never rebuilds the
+    listing's table.
+    """
+
+    def __init__(self, path: str, learned_max: int = SEARCH_LEARNED_MAX, fuzzy_threshold: float = SEARCH_FUZZY_THRESHOLD):
+        self.path = path
+        self.learned_max = learned_max
+        self.fuzzy_threshold = fuzzy_threshold
+        self.listing: Optional[SymbolTable] = None
+        self.learned = SymbolTable([])
+        self._learned: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._mtime: Optional[float] = None
+        self.local_hits = 0
+        self.upstream_queries = 0
+
+    async def refresh(self):
+        """(Re)build the listing table when the listing file has changed."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            logger.warning("Search listing %s not found", self.path)
+            return
+        if mtime == self._mtime:
+            return
+        entries = await asyncio.to_thread(_read_listing, self.path)
+        self.listing = await asyncio.to_thread(SymbolTable, entries)
+        self._mtime = mtime
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = False) -> List[Dict[str, Any]]:
+        """Best local prefix (or, with fuzzy, similarity) matches for a query, best first."""
+        matches: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        for table in (self.listing, self.learned):
+            if table is None:
+                continue
+            if fuzzy:
+                found = table.fuzzy(query, limit, self.fuzzy_threshold)
+            else:
+                found = table.search(query, limit)
+            for row, score in found.items():
+                entry = table.entries[row]
+                if score > matches.get(entry["symbol"], (-1.0, None))[0]:
+                    matches[entry["symbol"]] = (score, entry)
+        ranked = sorted(matches.values(), key=lambda match: (-match[0], len(match[1]["symbol"]), match[1]["symbol"]))
+        return [{**entry, "score": round(score, 4)} for score, entry in ranked[:limit]]
+
+    async def merge(self, items: List[Dict[str, Any]]):
+        """Add upstream listings to the learned table."""
+        for entry in _clean(items):
+            self._learned.pop(entry["symbol"], None)
+            self._learned[entry["symbol"]] = entry
+        while len(self._learned) > self.learned_max:
+            self._learned.popitem(last=False)
+        self.learned = await asyncio.to_thread(SymbolTable, list(self._learned.values()))
+
+    async def lookup(self, query: str, limit: int = 10, proxy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search locally, falling back to (cached) upstream search on a miss."""
+        results = self.search(query, limit)
+        if results:
+            self.local_hits += 1
+            return results
+
+        self.upstream_queries += 1
+        similar = self.search(query, limit, fuzzy=True)
+        try:
+            search_results = await get_or_load(
+                "search", None, {"query": query, "limit": limit},
+                lambda: run_blocking("search", search_quotes, query, limit, proxy),
+            )
+        except Exception:
+            if similar:
+                return similar
+            raise
+        results = [_format_upstream(item) for item in search_results or []]
+        if results:
+            await self.merge(results)
+        symbols = {result["symbol"] for result in results}
+        return (results + [match for match in similar if match["symbol"] not in symbols])[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "listings": len(self.listing.entries) if self.listing else 0,
+            "learned": len(self._learned),
+            "local_hits": self.local_hits,
+            "upstream_queries": self.upstream_queries,
+        }
+
+symbol_index = SymbolIndex(SEARCH_INDEX_FILE)
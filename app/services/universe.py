@@ -0,0 +1,15 @@
+from typing import List
+
+def load_symbols(path: str) -> List[str]:
+    """Read a symbol list: one symbol per line, '#' starts a comment."""
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            symbol = line.split("#", 1)[0].strip().upper()
+            if symbol:
+                symbols.append(symbol)
+    return list(dict.fromkeys(symbols))
+
+def normalize_symbols(symbols: List[str]) -> List[str]:
+    """Upper-case, strip and de-duplicate requested symbols, keeping their order."""
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
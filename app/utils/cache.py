@@ -0,0 +1,407 @@
+import logging
+import pickle
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.config import (
+    CACHE_BACKEND,
+    CACHE_ENABLED,
+    CACHE_EXPIRY,
+    CACHE_MAX_BYTES,
+    CACHE_STALE_TTL,
+    CACHE_TTLS,
+    REDIS_KEY_PREFIX,
+    REDIS_URL,
+)
+from app.utils.gateway import UpstreamUnavailable
+from app.utils.prefetch import prefetcher
+from app.utils.serializers import ColumnFrame
+from app.utils.singleflight import flights
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+def normalize_params(params) -> Dict[str, Any]:
+    """Turn a params model or dict into a flat dict of non-empty values."""
+    if params is None:
+        return {}
+    if hasattr(params, "model_dump"):
+        params = params.model_dump()
+    normalized = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        normalized[name] = value
+    return normalized
+
+def make_key(endpoint: str, symbol: Optional[str], params=None) -> str:
+    """Build a cache key from (endpoint, symbol, normalized params)."""
+    parts = [endpoint, (symbol or "").upper()]
+    normalized = normalize_params(params)
+    if normalized:
+        parts.append("&".join(f"{name}={normalized[name]}" for name in sorted(normalized)))
+    return ":".join(parts)
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory held by a cached value, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, ColumnFrame):
+        return int(value.index.memory_usage(deep=True)) + sum(int(column.nbytes) for column in value.data.values())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry TTL, LRU eviction and a
+    memory budget. Expired entries are kept for `stale_ttl` more seconds,
+    for get_stale().
+    """
+
+    def __init__(self, max_bytes: int, stale_ttl: int = CACHE_STALE_TTL):
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or MISSING if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at, size = entry
+            now = time.monotonic()
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: str) -> Any:
+        """Return the cached value even if expired (within stale_ttl), or MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] + self.stale_ttl <= time.monotonic():
+                return MISSING
+            self.stale_hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: int):
+        if ttl <= 0:
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale_hits": self.stale_hits,
+            }
+
+def ttl_for(endpoint: str) -> int:
+    """Return the freshness policy for one kind of data, in seconds."""
+    return CACHE_TTLS.get(endpoint, CACHE_EXPIRY)
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a cached value to compact binary (pickle + zlib)."""
+    return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+def decode_value(payload: bytes) -> Any:
+    return pickle.loads(zlib.decompress(payload))
+
+class StoredValue:
+    """A value stored in a shared backend, with the time it stops being fresh."""
+
+    __slots__ = ("fresh_until", "value")
+
+    def __init__(self, fresh_until: float, value: Any):
+        self.fresh_until = fresh_until
+        self.value = value
+
+    def __getstate__(self):
+        return (self.fresh_until, self.value)
+
+    def __setstate__(self, state):
+        self.fresh_until, self.value = state
+
+class CacheBackend:
+    """Interface shared by all response cache backends."""
+
+    name = "base"
+
+    async def get(self, key: str) -> Any:
+        """Return the cached value, or MISSING."""
+        raise NotImplementedError
+
+    async def get_stale(self, key: str) -> Any:
+        """Return the cached value even if it has expired, or MISSING."""
+        return MISSING
+
+    async def set(self, key: str, value: Any, ttl: int):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    async def close(self):
+        pass
+
+class MemoryBackend(CacheBackend):
+    """Per-process backend holding live Python objects in a TTLCache."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache = TTLCache(max_bytes)
+
+    async def get(self, key: str) -> Any:
+        return self.cache.get(key)
+
+    async def get_stale(self, key: str) -> Any:
+        return self.cache.get_stale(key)
+
+    async def set(self, key: str, value: Any, ttl: int):
+        self.cache.set(key, value, ttl)
+
+    async def delete(self, key: str):
+        self.cache.delete(key)
+
+    async def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.cache.stats()}
+
+class RedisBackend(CacheBackend):
+    """
+    Backend shared by every worker and replica through a Redis-protocol
+    server. Values are stored as compressed pickles, so the server must be
+    trusted and private to this deployment. Keys outlive their TTL by
+    stale_ttl seconds, with the freshness deadline stored in the value.
+
+    Any client implementing the redis.asyncio API can be passed in, e.g.
+    fakeredis.aioredis.FakeRedis() for local testing.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = REDIS_KEY_PREFIX, client=None, stale_ttl: int = CACHE_STALE_TTL):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.errors = 0
+        self.decode_errors = 0
+        self.bytes_written = 0
+
+    async def _load(self, key: str) -> Any:
+        try:
+            payload = await self.client.get(self.prefix + key)
+        except Exception as e:
+            # A cache outage should degrade to upstream fetches, not errors
+            logger.warning("Redis cache get failed: %s", e)
+            self.errors += 1
+            return None
+        if payload is None:
+            return None
+        try:
+            stored = decode_value(payload)
+        except Exception as e:
+            # Corrupt, or written by an incompatible version (pickles name
+            # the classes they hold): drop it and treat it as a miss
+            logger.warning("Redis cache value for %s could not be decoded: %s", key, e)
+            self.decode_errors += 1
+            try:
+                await self.client.delete(self.prefix + key)
+            except Exception as e:
+                logger.warning("Redis cache delete failed: %s", e)
+                self.errors += 1
+            return None
+        if not isinstance(stored, StoredValue):
+            # Written without a freshness deadline: fresh until the key expires
+            stored = StoredValue(float("inf"), stored)
+        return stored
+
+    async def get(self, key: str) -> Any:
+        stored = await self._load(key)
+        if stored is None or stored.fresh_until <= time.time():
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return stored.value
+
+    async def get_stale(self, key: str) -> Any:
+        stored = await self._load(key)
+        if stored is None:
+            return MISSING
+        self.stale_hits += 1
+        return stored.value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        if ttl <= 0:
+            return
+        payload = encode_value(StoredValue(time.time() + ttl, value))
+        try:
+            await self.client.set(self.prefix + key, payload, ex=ttl + self.stale_ttl)
+            self.bytes_written += len(payload)
+        except Exception as e:
+            logger.warning("Redis cache set failed: %s", e)
+            self.errors += 1
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "stale_hits": self.stale_hits,
+            "errors": self.errors,
+            "decode_errors": self.decode_errors,
+            "bytes_written": self.bytes_written,
+        }
+
+    async def close(self):
+        await self.client.close()
+
+def create_backend(name: str = CACHE_BACKEND) -> CacheBackend:
+    """Create the backend selected by the CACHE_BACKEND setting."""
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown cache backend: {name}")
+
+response_cache = create_backend()
+
+async def cache_get(endpoint: str, symbol: Optional[str], params) -> Any:
+    """Look up (endpoint, symbol, params) without loading; MISSING on a miss."""
+    if not CACHE_ENABLED:
+        return MISSING
+    return await response_cache.get(make_key(endpoint, symbol, params))
+
+async def cache_set(endpoint: str, symbol: Optional[str], params, value: Any):
+    """Store a value fetched outside get_or_load, e.g. by a batch call."""
+    if CACHE_ENABLED:
+        key = make_key(endpoint, symbol, params)
+        await response_cache.set(key, value, ttl_for(endpoint))
+        prefetcher.stored(key, time.time() + ttl_for(endpoint))
+
+async def get_or_load(
+    endpoint: str,
+    symbol: Optional[str],
+    params,
+    loader: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Return the cached value for (endpoint, symbol, params), calling loader()
+    and caching its result on a miss. Concurrent misses for the same key
+    share a single loader() call. Keys of prefetched endpoints are counted,
+    so hot ones are reloaded before they expire. While Yahoo is unavailable
+    an expired value is served if the cache still holds one.
+    """
+    key = make_key(endpoint, symbol, params)
+    if not CACHE_ENABLED:
+        return await flights.do(key, loader)
+
+    async def load_and_store():
+        value = await loader()
+        ttl = ttl_for(endpoint)
+        await response_cache.set(key, value, ttl)
+        prefetcher.stored(key, time.time() + ttl)
+        return value
+
+    prefetcher.track(endpoint, key, lambda: flights.do(key, load_and_store))
+    value = await response_cache.get(key)
+    if value is not MISSING:
+        return value
+    try:
+        return await flights.do(key, load_and_store)
+    except UpstreamUnavailable:
+        stale = await response_cache.get_stale(key)
+        if stale is MISSING:
+            raise
+        return stale
@@ -0,0 +1,52 @@
+import threading
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from app.utils.yahoo_session import yahoo
+
+# yf.download collects its results in module-level state, so only one
+# download may run at a time.
+_download_lock = threading.Lock()
+
+def _errors(symbols: List[str]) -> Dict[str, str]:
+    # Ticker.history() calls running outside the lock record their failures
+    # in the same module-level dict; keep only this download's symbols
+    requested = {symbol.upper(): symbol for symbol in symbols}
+    return {
+        requested[symbol]: error
+        for symbol, error in yf.shared._ERRORS.items() if symbol in requested
+    }
+
+def download(symbols: List[str], **kwargs) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """
+    Fetch several symbols with one threaded yf.download call.
+
+    Returns the downloaded frame and the error message of every symbol that
+    failed.
+    """
+    with _download_lock:
+        data = yf.download(symbols, threads=True, progress=False, session=yahoo.session, **kwargs)
+        errors = _errors(symbols)
+    return data, errors
+
+def download_frames(symbols: List[str], **kwargs) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """
+    Fetch several symbols with one threaded yf.download call, keeping each
+    symbol's own frame: indexed in its exchange's timezone, as
+    Ticker.history() returns it, rather than on the combined frame's index
+    (tz-naive, or UTC when the symbols' timezones differ).
+
+    Returns the frame of every symbol that returned one and the error
+    message of every symbol that failed.
+    """
+    with _download_lock:
+        yf.download(symbols, threads=True, progress=False, session=yahoo.session, ignore_tz=False, **kwargs)
+        downloaded = yf.shared._DFS
+        frames = {
+            symbol: downloaded[symbol.upper()]
+            for symbol in symbols if downloaded.get(symbol.upper()) is not None
+        }
+        errors = _errors(symbols)
+    return frames, errors
@@ -0,0 +1,94 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.config import (
+    EXECUTOR_MAX_WORKERS,
+    UPSTREAM_CONCURRENCY,
+    UPSTREAM_CONCURRENCY_DEFAULT,
+)
+from app.utils.gateway import UpstreamGateway
+
+class UpstreamExecutor:
+    """
+    Run blocking yfinance calls on a shared thread pool.
+
+    Each upstream (ticker, market, search, ...) gets its own concurrency limit
+    so that a burst on one kind of call cannot take every worker thread.
+    """
+
+    def __init__(self, max_workers: int, limits: Dict[str, int], default_limit: int):
+        self.max_workers = max_workers
+        self._limits = dict(limits)
+        self._default_limit = default_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yfinance")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._waiting: Dict[str, int] = {}
+        self._active: Dict[str, int] = {}
+        self._completed: Dict[str, int] = {}
+        self._failed: Dict[str, int] = {}
+
+    def _semaphore(self, upstream: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(upstream)
+        if semaphore is None:
+            limit = self._limits.get(upstream, self._default_limit)
+            semaphore = asyncio.Semaphore(limit)
+            self._semaphores[upstream] = semaphore
+            self._waiting[upstream] = 0
+            self._active[upstream] = 0
+            self._completed[upstream] = 0
+            self._failed[upstream] = 0
+        return semaphore
+
+    async def run(self, upstream: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool, respecting the upstream's limit."""
+        semaphore = self._semaphore(upstream)
+        self._waiting[upstream] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[upstream] -= 1
+
+        self._active[upstream] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+            self._completed[upstream] += 1
+            return result
+        except BaseException:
+            self._failed[upstream] += 1
+            raise
+        finally:
+            self._active[upstream] -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size, queue depth and per-upstream counters."""
+        upstreams = {}
+        for upstream in self._semaphores:
+            upstreams[upstream] = {
+                "limit": self._limits.get(upstream, self._default_limit),
+                "waiting": self._waiting[upstream],
+                "active": self._active[upstream],
+                "completed": self._completed[upstream],
+                "failed": self._failed[upstream],
+            }
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self._pool._work_queue.qsize(),
+            "upstreams": upstreams,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+executor = UpstreamExecutor(EXECUTOR_MAX_WORKERS, UPSTREAM_CONCURRENCY, UPSTREAM_CONCURRENCY_DEFAULT)
+gateway = UpstreamGateway(executor.run)
+
+async def run_blocking(upstream: str, fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking yfinance call off the event loop, through the gateway's
+    rate limit, retries and circuit breaker.
+    """
+    return await gateway.call(upstream, fn, *args, **kwargs)
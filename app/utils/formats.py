@@ -0,0 +1,147 @@
+import importlib.util
+import io
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from fastapi.responses import Response
+
+from app.utils.serializers import ColumnFrame, column_values, encode_default, dataframe_to_dict, json_response
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+ARROW = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+MSGPACK = "application/msgpack"
+
+# Accepted spellings of each format, and the module it needs (if any)
+_MEDIA_TYPES: Dict[str, Tuple[str, Optional[str]]] = {
+    JSON: (JSON, None),
+    NDJSON: (NDJSON, None),
+    "application/jsonl": (NDJSON, None),
+    ARROW: (ARROW, "pyarrow"),
+    PARQUET: (PARQUET, "pyarrow"),
+    "application/x-parquet": (PARQUET, "pyarrow"),
+    "application/parquet": (PARQUET, "pyarrow"),
+    MSGPACK: (MSGPACK, "msgpack"),
+    "application/x-msgpack": (MSGPACK, "msgpack"),
+    "application/vnd.msgpack": (MSGPACK, "msgpack"),
+}
+
+_available: Dict[str, bool] = {}
+
+def _has_module(name: Optional[str]) -> bool:
+    if name is None:
+        return True
+    if name not in _available:
+        _available[name] = importlib.util.find_spec(name) is not None
+    return _available[name]
+
+def _parse_accept(accept: str) -> List[str]:
+    """Media ranges of an Accept header, most preferred first."""
+    ranges = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *parameters = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(ranges)]
+
+def negotiate(accept: Optional[str], offered: Sequence[str] = (JSON, ARROW, PARQUET, MSGPACK)) -> str:
+    """
+    Pick the response media type for an Accept header among the offered
+    ones. The first offered type is the default, and is also used when none
+    of the requested formats is installed.
+    """
+    for media_type in _parse_accept(accept or ""):
+        if media_type in ("application/*", "*/*"):
+            return offered[0]
+        if media_type in _MEDIA_TYPES:
+            media_type, module = _MEDIA_TYPES[media_type]
+            if media_type in offered and _has_module(module):
+                return media_type
+    return offered[0]
+
+def _as_frame(df) -> pd.DataFrame:
+    if isinstance(df, (pd.Series, ColumnFrame)):
+        df = df.to_frame()
+    return df.rename(columns=str)
+
+def _to_arrow_table(df):
+    import pyarrow as pa
+    # The index (e.g. a tz-aware Datetime) becomes a timestamp column, and the
+    # pandas metadata lets read_pandas()/to_pandas() restore it as the index
+    return pa.Table.from_pandas(_as_frame(df), preserve_index=True)
+
+def arrow_table(df, schema=None):
+    """A DataFrame as an Arrow table, optionally cast to an existing schema."""
+    import pyarrow as pa
+    if schema is None:
+        return _to_arrow_table(df)
+    return pa.Table.from_pandas(_as_frame(df), schema=schema, preserve_index=True)
+
+def to_arrow_stream(df) -> bytes:
+    import pyarrow as pa
+    table = _to_arrow_table(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def to_parquet(df) -> bytes:
+    import pyarrow.parquet as pq
+    buffer = io.BytesIO()
+    pq.write_table(_to_arrow_table(df), buffer)
+    return buffer.getvalue()
+
+def to_msgpack(df) -> bytes:
+    """
+    Columnar MessagePack map. A DatetimeIndex is sent as int64 nanoseconds
+    since the epoch (UTC) along with its timezone name.
+    """
+    import msgpack
+    df = _as_frame(df)
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        index_values = index.as_unit("ns").asi8.tolist()
+        tz = str(index.tz) if index.tz is not None else None
+    else:
+        index_values = column_values(index.to_series())
+        tz = None
+    columns = {}
+    for i, name in enumerate(df.columns):
+        values = column_values(df.iloc[:, i])
+        columns[name] = values if isinstance(values, list) else values.tolist()
+    payload = {
+        "index_name": index.name,
+        "index": index_values,
+        "tz": tz,
+        "columns": columns,
+    }
+    return msgpack.packb(payload, default=encode_default)
+
+_ENCODERS = {
+    ARROW: to_arrow_stream,
+    PARQUET: to_parquet,
+    MSGPACK: to_msgpack,
+}
+
+def dataframe_response(df, accept: Optional[str], orient: str = "records", **fields) -> Response:
+    """
+    Encode a DataFrame in the format negotiated from the Accept header:
+    Arrow IPC stream, Parquet or MessagePack, else the JSON envelope (with
+    any extra fields next to its data).
+    """
+    media_type = negotiate(accept)
+    if media_type == JSON:
+        response = json_response(dataframe_to_dict(df, orient), **fields)
+    else:
+        response = Response(_ENCODERS[media_type](df), media_type=media_type)
+    response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,243 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import requests
+
+from app.config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    UPSTREAM_BACKOFF_BASE,
+    UPSTREAM_BACKOFF_MAX,
+    UPSTREAM_BURST,
+    UPSTREAM_MAX_ATTEMPTS,
+    UPSTREAM_RATE,
+)
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RETRYABLE_MESSAGES = ("429", "too many requests", "rate limit", "timed out", "temporarily unavailable")
+
+# Set for background work (scheduled refreshes, prefetching, warm-up) and
+# inherited by the tasks it starts: its calls yield the rate to requests
+in_background = contextvars.ContextVar("in_background", default=False)
+
+class UpstreamUnavailable(Exception):
+    """Yahoo could not be reached: retries ran out or the circuit is open."""
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an upstream error is throttling or a transient failure, not a bad request."""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, TimeoutError, ConnectionError)):
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) in _RETRYABLE_STATUS:
+        return True
+    message = str(error).lower()
+    return any(text in message for text in _RETRYABLE_MESSAGES)
+
+class TokenBucket:
+    """
+    Admit `rate` calls per second on average, in bursts of at most `burst`.
+
+    Calls reserve the next token in arrival order. Background calls never
+    reserve ahead: one at a time, they wait until a token is free, so a
+    refresh of a whole universe cannot queue up in front of requests.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic, sleep=asyncio.sleep):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._background = asyncio.Lock()
+        self.waited = 0.0
+        self.background_waited = 0.0
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, background: bool = False):
+        if self.rate <= 0:
+            return
+        if background:
+            await self._acquire_background()
+            return
+        self._refill()
+        # Reserve a token now (possibly going negative) so waiters queue fairly
+        self._tokens -= 1
+        if self._tokens < 0:
+            delay = -self._tokens / self.rate
+            self.waited += delay
+            await self.sleep(delay)
+
+    async def _acquire_background(self):
+        async with self._background:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                # Tokens reserved by requests meanwhile push this back further
+                delay = (1 - self._tokens) / self.rate
+                self.background_waited += delay
+                await self.sleep(delay)
+
+class CircuitBreaker:
+    """
+    Closed until `threshold` consecutive failures, then open (calls fail
+    fast) for `reset_timeout` seconds, then half-open: one trial call closes
+    it again on success or re-opens it on failure.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial:
+            self.trial = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def release(self):
+        """End a trial call that neither succeeded nor failed, so another can be tried."""
+        self.trial = False
+
+    def failure(self):
+        self.failures += 1
+        if self.trial or (self.opened_at is None and self.failures >= self.threshold):
+            self.opened_at = self.clock()
+            self.opened += 1
+        self.trial = False
+
+class UpstreamGateway:
+    """
+    Single path for every blocking yfinance call: a shared token bucket
+    paces calls to Yahoo, throttling and transient errors are retried with
+    jittered exponential backoff, and each upstream (ticker, market, search,
+    ...) has a circuit breaker that fails fast while Yahoo keeps failing.
+
+    `runner` executes the call (the worker pool by default); a fake upstream
+    can be exercised by passing any fn to call(), and tests can inject
+    `sleep`, `clock` and `rng` to run without waiting.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[Any]],
+        rate: float = UPSTREAM_RATE,
+        burst: int = UPSTREAM_BURST,
+        max_attempts: int = UPSTREAM_MAX_ATTEMPTS,
+        backoff_base: float = UPSTREAM_BACKOFF_BASE,
+        backoff_max: float = UPSTREAM_BACKOFF_MAX,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+        sleep=asyncio.sleep,
+        rng: random.Random = None,
+    ):
+        self.runner = runner
+        self.bucket = TokenBucket(rate, burst, clock, sleep)
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def breaker(self, upstream: str) -> CircuitBreaker:
+        breaker = self.breakers.get(upstream)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            self.breakers[upstream] = breaker
+            self.retries[upstream] = 0
+            self.rejected[upstream] = 0
+        return breaker
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        return self.rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    async def call(self, upstream: str, fn: Callable, *args, **kwargs) -> Any:
+        breaker = self.breaker(upstream)
+        for attempt in range(1, self.max_attempts + 1):
+            if not breaker.allow():
+                self.rejected[upstream] += 1
+                raise CircuitOpenError(f"Upstream {upstream} is unavailable, retrying in {self.reset_timeout:g}s")
+            await self.bucket.acquire(in_background.get())
+            try:
+                result = await self.runner(upstream, fn, *args, **kwargs)
+            except asyncio.CancelledError:
+                # The caller went away (a stream client disconnected, say)
+                breaker.release()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # A bad symbol or parameter says nothing about Yahoo's health
+                    breaker.release()
+                    raise
+                breaker.failure()
+                if attempt == self.max_attempts:
+                    raise UpstreamUnavailable(f"Upstream {upstream} failed after {attempt} attempts: {e}") from e
+                self.retries[upstream] += 1
+                delay = self.backoff(attempt)
+                logger.info("Upstream %s failed (%s), retry %d in %.2fs", upstream, e, attempt, delay)
+                await self.sleep(delay)
+            else:
+                breaker.success()
+                return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.bucket.rate,
+            "burst": self.bucket.burst,
+            "rate_limited_seconds": self.bucket.waited,
+            "background_rate_limited_seconds": self.bucket.background_waited,
+            "upstreams": {
+                upstream: {
+                    "circuit": breaker.state,
+                    "consecutive_failures": breaker.failures,
+                    "opened": breaker.opened,
+                    "retries": self.retries[upstream],
+                    "rejected": self.rejected[upstream],
+                }
+                for upstream, breaker in self.breakers.items()
+            },
+        }
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional
+
+from app.config import (
+    PREFETCH_ENDPOINTS,
+    PREFETCH_HALF_LIFE,
+    PREFETCH_INTERVAL,
+    PREFETCH_LEAD,
+    PREFETCH_MAX_TRACKED,
+    PREFETCH_MIN_HITS,
+    PREFETCH_RATE,
+    PREFETCH_TOP_K,
+)
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+class _HotKey:
+    __slots__ = ("endpoint", "score", "seen_at", "expires_at", "ttl", "refresh")
+
+    def __init__(self, endpoint: str, refresh: Job):
+        self.endpoint = endpoint
+        self.score = 0.0
+        self.seen_at = 0.0
+        self.expires_at: Optional[float] = None
+        self.ttl: Optional[float] = None
+        self.refresh = refresh
+
+    def decayed(self, now: float, half_life: float) -> float:
+        return self.score * 0.5 ** ((now - self.seen_at) / half_life)
+
+class Prefetcher:
+    """
+    Keeps hot cache entries warm. Every request for a tracked endpoint bumps
+    its key's score (exponentially decayed, so yesterday's favourites fade);
+    run() is called every `interval` seconds and refreshes the top-K keys
+    whose entries expire before the next round or two, so their next readers
+    never see a miss. The lead is at most `lead` seconds, and for keys whose
+    TTL is short, just one round: a key is refreshed once per TTL, not on
+    every round.
+
+    Refreshes, and the warm-up jobs queued at startup, share one token
+    bucket of `rate` upstream loads per second.
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[str] = PREFETCH_ENDPOINTS,
+        top_k: int = PREFETCH_TOP_K,
+        lead: float = PREFETCH_LEAD,
+        interval: float = PREFETCH_INTERVAL,
+        rate: float = PREFETCH_RATE,
+        half_life: float = PREFETCH_HALF_LIFE,
+        min_hits: float = PREFETCH_MIN_HITS,
+        max_tracked: int = PREFETCH_MAX_TRACKED,
+    ):
+        self.endpoints = set(endpoints)
+        self.top_k = top_k
+        self.lead = lead
+        self.interval = interval
+        self.rate = rate
+        self.half_life = half_life
+        self.min_hits = min_hits
+        self.max_tracked = max_tracked
+        self._keys: Dict[str, _HotKey] = {}
+        self._warm: Deque[Job] = deque()
+        self._tokens = 0.0
+        self._filled_at: Optional[float] = None
+        self.refreshed = 0
+        self.warmed = 0
+        self.failures = 0
+
+    def track(self, endpoint: str, key: str, refresh: Job, expires_at: Optional[float] = None):
+        """Count a request for key; refresh() reloads and re-caches it."""
+        if endpoint not in self.endpoints:
+            return
+        now = time.time()
+        hot = self._keys.get(key)
+        if hot is None:
+            if len(self._keys) >= self.max_tracked:
+                self._prune(now)
+            hot = self._keys[key] = _HotKey(endpoint, refresh)
+        hot.score = hot.decayed(now, self.half_life) + 1.0
+        hot.seen_at = now
+        hot.refresh = refresh
+        if expires_at is not None:
+            hot.expires_at = expires_at
+
+    def stored(self, key: str, expires_at: float):
+        """Record when a tracked key's freshly stored value expires."""
+        hot = self._keys.get(key)
+        if hot is not None:
+            hot.expires_at = expires_at
+            hot.ttl = expires_at - time.time()
+
+    def _prune(self, now: float):
+        """Drop the coldest half of the tracked keys."""
+        ranked = sorted(self._keys, key=lambda key: self._keys[key].decayed(now, self.half_life))
+        for key in ranked[:len(ranked) // 2 + 1]:
+            del self._keys[key]
+
+    def warm(self, jobs: Iterable[Job]):
+        """Queue loads to run under the rate budget, after any due refreshes."""
+        self._warm.extend(jobs)
+
+    def lead_for(self, hot: _HotKey) -> float:
+        """Seconds before expiry a key is due: one round, or a quarter of a long TTL, up to `lead`."""
+        return min(self.lead, max(self.interval, (hot.ttl or 0.0) / 4))
+
+    def hot_keys(self, now: Optional[float] = None) -> List[str]:
+        """The top-K keys by decayed request count, hottest first."""
+        now = time.time() if now is None else now
+        scored = [
+            (hot.decayed(now, self.half_life), key)
+            for key, hot in self._keys.items()
+        ]
+        scored = [item for item in scored if item[0] >= self.min_hits]
+        scored.sort(reverse=True)
+        return [key for _, key in scored[:self.top_k]]
+
+    def _take_tokens(self, now: float) -> int:
+        if self._filled_at is None:
+            self._filled_at = now
+        # Bank at most one lead window of budget, so an idle spell cannot
+        # turn into a burst of upstream calls
+        capacity = max(self.rate * self.lead, 1.0)
+        self._tokens = min(self._tokens + (now - self._filled_at) * self.rate, capacity)
+        self._filled_at = now
+        return int(self._tokens)
+
+    async def _run_job(self, job: Job) -> bool:
+        try:
+            await job()
+            return True
+        except Exception as e:
+            self.failures += 1
+            logger.debug("Prefetch failed: %s", e)
+            return False
+
+    async def run(self):
+        """Refresh hot keys that are about to expire, then work through the warm-up queue."""
+        now = time.time()
+        budget = self._take_tokens(now)
+        due = [
+            key for key in self.hot_keys(now)
+            if self._keys[key].expires_at is not None
+            and self._keys[key].expires_at - now <= self.lead_for(self._keys[key])
+        ][:budget]
+        jobs = [self._keys[key].refresh for key in due]
+        warm = [self._warm.popleft() for _ in range(min(budget - len(jobs), len(self._warm)))]
+        self._tokens -= len(jobs) + len(warm)
+        if not jobs and not warm:
+            return
+        for key in due:
+            # Not due again until the refresh stores its value
+            self._keys[key].expires_at = None
+        results = await asyncio.gather(*(self._run_job(job) for job in jobs + warm))
+        self.refreshed += sum(results[:len(jobs)])
+        self.warmed += sum(results[len(jobs):])
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "tracked": len(self._keys),
+            "hot": len(self.hot_keys(now)),
+            "refreshed": self.refreshed,
+            "warm_pending": len(self._warm),
+            "warmed": self.warmed,
+            "failures": self.failures,
+        }
+
+prefetcher = Prefetcher()
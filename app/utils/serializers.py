@@ -1,51 +1,223 @@
 import pandas as pd
 import numpy as np
-import json
+import orjson
 from datetime import date, datetime
 from decimal import Decimal
+from typing import Any, Dict, List, Optional
 
-class JSONEncoder(json.JSONEncoder):
-    """Extended JSON encoder to handle pandas and numpy types."""
-    
-    def default(self, obj):
-        if isinstance(obj, (np.integer, np.int64)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64)):
-            return float(obj)
-        elif isinstance(obj, np.bool_):
-            return bool(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, pd.Series):
-            return obj.to_dict()
-        elif isinstance(obj, pd.Timestamp):
-            return obj.isoformat()
-        elif isinstance(obj, pd.DataFrame):
-            return obj.to_dict(orient="records")
-        elif isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, (datetime, date)):
-            return obj.isoformat()
-        elif pd.isna(obj):
-            return None
-        return super().default(obj)
+from fastapi.responses import Response
+
+from app.utils.gateway import UpstreamUnavailable, is_retryable
+
+ORIENTS = ("records", "split", "columns")
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def encode_default(obj):
+    """Handle the pandas/numpy values orjson does not encode natively."""
+    if isinstance(obj, pd.Timestamp):
+        return None if pd.isna(obj) else obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        # Only reached for dtypes orjson cannot encode, e.g. object arrays
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.Series):
+        return obj.to_dict()
+    if isinstance(obj, pd.DataFrame):
+        return dataframe_to_dict(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def json_dumps(obj) -> bytes:
+    """Encode to JSON bytes; numpy arrays are written from their buffers, NaN as null."""
+    return orjson.dumps(obj, default=encode_default, option=_ORJSON_OPTIONS)
 
 def json_serialize(obj):
     """Serialize object to JSON-compatible format."""
-    return json.dumps(obj, cls=JSONEncoder)
+    return json_dumps(obj).decode()
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson instead of the stdlib encoder."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+def json_response(data: Any, **fields) -> FastJSONResponse:
+    """
+    Wrap data in the standard {success, data, error} envelope (plus any extra
+    fields, e.g. count) and encode it directly, skipping response model
+    validation of (possibly huge) payloads.
+    """
+    return FastJSONResponse({"success": True, "data": data, **fields, "error": None})
+
+def _format_datetimes(index: pd.DatetimeIndex) -> List[Optional[str]]:
+    """ISO 8601 strings for a DatetimeIndex, including the UTC offset when tz-aware."""
+    wall = index.tz_localize(None) if index.tz is not None else index
+    strings = np.datetime_as_string(wall.to_numpy(dtype="datetime64[s]"), unit="s")
+    if index.tz is not None:
+        # Offsets can change within a range (DST), so suffix each distinct one
+        offsets = (wall - index.tz_convert(None)).total_seconds().astype(int)
+        suffixes = np.empty(len(index), dtype="<U6")
+        for offset in np.unique(offsets):
+            sign = "+" if offset >= 0 else "-"
+            hours, minutes = divmod(abs(int(offset)) // 60, 60)
+            suffixes[offsets == offset] = f"{sign}{hours:02d}:{minutes:02d}"
+        strings = np.char.add(strings, suffixes)
+    values = strings.tolist()
+    if index.hasnans:
+        for i in np.flatnonzero(index.isna()):
+            values[i] = None
+    return values
+
+def _index_values(index: pd.Index) -> List[Any]:
+    if isinstance(index, pd.DatetimeIndex):
+        return _format_datetimes(index)
+    return _object_values(index.to_series())
+
+def _object_values(values: pd.Series) -> List[Any]:
+    values = values.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+class ColumnFrame:
+    """
+    Read-only numpy columns sharing one index: a stand-in for a DataFrame
+    that does not copy its columns (e.g. views into memory-mapped files).
+    The serializers here accept it wherever they accept a DataFrame.
+    """
+
+    def __init__(self, index: pd.Index, columns: Dict[str, np.ndarray]):
+        self.index = index
+        self.data = columns
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.data)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.index) == 0 or not self.data
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.data[name]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.data, index=self.index)
+
+def column_values(column):
+    """
+    A column (Series or array) as something orjson encodes quickly: numeric
+    and boolean columns stay numpy arrays (NaN becomes null), everything
+    else becomes a list.
+    """
+    if isinstance(column, np.ndarray) and column.dtype.kind in "biuf":
+        return np.ascontiguousarray(column)
+    if isinstance(column, np.ndarray):
+        column = pd.Series(column)
+    dtype = column.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        return np.ascontiguousarray(column.to_numpy())
+    if isinstance(dtype, pd.DatetimeTZDtype) or (isinstance(dtype, np.dtype) and dtype.kind == "M"):
+        return _format_datetimes(pd.DatetimeIndex(column))
+    return _object_values(column)
 
 def dataframe_to_dict(df, orient="records"):
-    """Convert pandas DataFrame to dict."""
-    if isinstance(df, pd.DataFrame):
-        # Reset index to make it a column
-        df_reset = df.reset_index()
-        
-        # Convert any potential non-serializable objects
-        for col in df_reset.columns:
-            if df_reset[col].dtype == 'datetime64[ns]':
-                df_reset[col] = df_reset[col].dt.strftime('%Y-%m-%d %H:%M:%S')
-            elif df_reset[col].dtype == 'object':
-                df_reset[col] = df_reset[col].apply(lambda x: str(x) if x is not None else None)
-                
-        return df_reset.to_dict(orient=orient)
-    return df 
\ No newline at end of file
+    """
+    Convert a pandas DataFrame (or Series, or ColumnFrame) to a JSON-ready
+    payload, with the index as ISO 8601 strings and NaN as null.
+
+    - records: [{index_name: ..., column: value, ...}, ...]
+    - split:   {"index": [...], "columns": [...], "data": [[...], ...]}
+    - columns: {"index": [...], "columns": {column: [...]}}
+
+    split and columns keep numeric data as numpy arrays, so the result must be
+    encoded with json_dumps / json_response.
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    if not isinstance(df, (pd.DataFrame, ColumnFrame)):
+        return df
+    if orient not in ORIENTS:
+        raise ValueError(f"Unknown orient: {orient} (expected one of {', '.join(ORIENTS)})")
+
+    index = _index_values(df.index)
+    names = [str(col) for col in df.columns]
+    if isinstance(df, ColumnFrame):
+        columns = [column_values(values) for values in df.data.values()]
+    else:
+        columns = [column_values(df.iloc[:, i]) for i in range(df.shape[1])]
+
+    if orient == "columns":
+        return {"index": index, "columns": dict(zip(names, columns))}
+    if orient == "split":
+        if columns and all(isinstance(values, np.ndarray) for values in columns):
+            data = np.column_stack(columns)
+        else:
+            data = [list(row) for row in zip(*(list(values) for values in columns))]
+        return {"index": index, "columns": names, "data": data}
+
+    index_name = str(df.index.name) if df.index.name is not None else "index"
+    keys = [index_name] + names
+    rows = zip(index, *(values.tolist() if isinstance(values, np.ndarray) else values for values in columns))
+    return [dict(zip(keys, row)) for row in rows]
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+def fast_info_to_dict(fast_info, keys=None):
+    """
+    Read yfinance's lazy-loading FastInfo mapping into a plain dict.
+
+    Fields a symbol does not have (e.g. shares for an index) are None, but
+    a failed fetch raises: transient errors as they are, so the gateway
+    retries them, and a quote without lastPrice (or with no fields at all,
+    which is how FastInfo reports a failed price history) as
+    UpstreamUnavailable, so it is neither served nor cached.
+    """
+    result = {}
+    for key in keys or fast_info.keys():
+        try:
+            result[key] = fast_info[key]
+        except Exception as e:
+            if is_retryable(e):
+                raise
+            result[key] = None
+    if all(_missing(value) for value in result.values()) or _missing(result.get("lastPrice", 0.0)):
+        raise UpstreamUnavailable("No price data: Yahoo is unavailable or the symbol is unknown")
+    return result
+
+def statement_to_dict(stmt, compact=False):
+    """
+    Convert a yfinance financial statement (line items x periods) to a
+    JSON-ready payload in one vectorized pass, with NaN mapped to None.
+
+    By default the result is {period: {line_item: value}}. With compact=True
+    it is {"periods": [...], "line_items": [...], "values": [[...]]}, where
+    values[i][j] is line_items[i] for periods[j]; values is a numpy matrix,
+    so encode the compact form with json_dumps / json_response.
+    """
+    if stmt is None or stmt.empty:
+        return {"periods": [], "line_items": [], "values": []} if compact else {}
+
+    periods = [str(col.date()) if hasattr(col, "date") else str(col) for col in stmt.columns]
+    line_items = [str(row) for row in stmt.index]
+    try:
+        values = stmt.to_numpy(dtype=float, na_value=np.nan)
+    except (TypeError, ValueError):
+        values = stmt.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    if compact:
+        # Encoded straight from the float buffer by json_dumps (NaN as null)
+        return {"periods": periods, "line_items": line_items, "values": np.ascontiguousarray(values)}
+    cells = values.astype(object)
+    cells[np.isnan(values)] = None
+    return {period: dict(zip(line_items, column)) for period, column in zip(periods, cells.T.tolist())}
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.utils.gateway import in_background
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """Run an async job every `interval` seconds for the app's lifetime."""
+
+    def __init__(self, name: str, interval: float, job: Callable[[], Awaitable[Any]]):
+        self.name = name
+        self.interval = interval
+        self.job = job
+        self.runs = 0
+        self.failures = 0
+        self.last_duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        # Upstream calls made by the job yield the rate budget to requests
+        in_background.set(True)
+        while True:
+            started = time.monotonic()
+            try:
+                await self.job()
+                self.runs += 1
+            except Exception:
+                self.failures += 1
+                logger.exception("Background task %s failed", self.name)
+            self.last_duration = time.monotonic() - started
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "running": self._task is not None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_duration": self.last_duration,
+        }
+
+scheduled_tasks: Dict[str, PeriodicTask] = {}
+
+def schedule(name: str, interval: float, job: Callable[[], Awaitable[Any]]) -> PeriodicTask:
+    """Register a background job; it is started from the app lifespan."""
+    task = PeriodicTask(name, interval, job)
+    scheduled_tasks[name] = task
+    return task
+
+def start_all():
+    for task in scheduled_tasks.values():
+        task.start()
+
+async def stop_all():
+    for task in scheduled_tasks.values():
+        await task.stop()
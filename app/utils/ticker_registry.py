@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import yfinance as yf
+
+from app.config import TICKER_IDLE_TIMEOUT, TICKER_REGISTRY_SIZE
+from app.utils.yahoo_session import yahoo
+
+Key = Tuple[str, Optional[str]]
+
+# Attributes parsed from one shared scrape (yfinance 0.2.32 fetches the
+# holders page once for all three). Info, statements and earnings are each
+# fetched on their own, so a pooled Ticker would save nothing for them.
+POOLED_ATTRIBUTES = frozenset({"major_holders", "institutional_holders", "mutualfund_holders"})
+
+def new_ticker(symbol: str) -> yf.Ticker:
+    """
+    A Ticker of its own on the shared session, for history and metadata
+    calls: they keep per-call state on the instance (actions and dividends
+    read the last history() frame, fast_info caches prices) and so must not
+    share one.
+    """
+    return yf.Ticker(symbol, session=yahoo.session)
+
+class _Entry:
+    __slots__ = ("ticker", "created_at", "used_at", "_locks", "_guard")
+
+    def __init__(self, ticker: yf.Ticker, now: float):
+        self.ticker = ticker
+        self.created_at = now
+        self.used_at = now
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def lock(self, attribute: str) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.get(attribute)
+            if lock is None:
+                lock = self._locks[attribute] = threading.Lock()
+            return lock
+
+def read_attribute(symbol: str, attribute: str, max_age: Optional[float] = None) -> Any:
+    """
+    Read a Ticker attribute (blocking): from the pool when other attributes
+    share its scrape, otherwise from a Ticker of its own.
+    """
+    if attribute in POOLED_ATTRIBUTES:
+        return tickers.read(symbol, attribute, max_age=max_age)
+    return getattr(new_ticker(symbol), attribute)
+
+class TickerRegistry:
+    """
+    A bounded pool of yf.Ticker objects keyed on (symbol, proxy), so data
+    a Ticker scrapes once for several attributes (POOLED_ATTRIBUTES) is
+    reused by later reads of the others for the same symbol.
+
+    Entries are evicted least recently used first, and once idle for
+    `idle_timeout` seconds. read() takes a lock per attribute: concurrent
+    reads of one attribute share a single fetch, reads of different
+    attributes (or symbols) run in parallel. Callers pass the freshness
+    they need as max_age; an older Ticker is replaced by a new one.
+    """
+
+    def __init__(self, max_size: int = TICKER_REGISTRY_SIZE, idle_timeout: float = TICKER_IDLE_TIMEOUT, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _evict(self, now: float):
+        # Least recently used first, so idle entries are at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and now - entry.used_at < self.idle_timeout:
+                break
+            del self._entries[key]
+            self.evictions += 1
+
+    def _checkout(self, symbol: str, proxy: Optional[str], max_age: Optional[float]) -> _Entry:
+        key = (symbol.upper(), proxy)
+        now = self.clock()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None and max_age is not None and now - entry.created_at >= max_age:
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                entry = self._entries[key] = _Entry(new_ticker(symbol), now)
+                self._evict(now)
+            else:
+                self.hits += 1
+            entry.used_at = now
+            self._entries.move_to_end(key)
+        return entry
+
+    def read(self, symbol: str, attribute: str, proxy: Optional[str] = None, max_age: Optional[float] = None) -> Any:
+        """Read one of the pooled Ticker's (blocking, self-caching) attributes."""
+        entry = self._checkout(symbol, proxy, max_age)
+        with entry.lock(attribute):
+            return getattr(entry.ticker, attribute)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict(self.clock())
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+tickers = TickerRegistry()
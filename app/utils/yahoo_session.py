@@ -0,0 +1,79 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from yfinance.data import YfData
+
+from app.config import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, YAHOO_CRUMB_MAX_AGE
+from app.utils.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+class YahooSession:
+    """
+    The one HTTP session every yfinance call shares: a keep-alive connection
+    pool per Yahoo host, sized for the worker pool, and yfinance's cookie and
+    crumb. maintain() renews the crumb in the background when it gets old or
+    yfinance has dropped it, so request handlers reuse warm connections and
+    a valid crumb instead of each fetching their own.
+    """
+
+    def __init__(self, pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE, max_age: float = YAHOO_CRUMB_MAX_AGE):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_age = max_age
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        # yfinance keeps the cookie and crumb on a process-wide singleton;
+        # hand it this session so calls made without one share it too
+        self._data = YfData(session=self.session)
+        self.crumb: Optional[str] = None
+        self.strategy: Optional[str] = None
+        self.fetched_at: Optional[float] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def refresh(self):
+        """Fetch a new crumb (and cookie, if it has expired). Blocking."""
+        with self._data._cookie_lock:
+            self._data._crumb = None
+        _, crumb, strategy = self._data._get_cookie_and_crumb()
+        if not crumb:
+            self.failures += 1
+            raise ConnectionError("Could not fetch a Yahoo crumb")
+        self.crumb, self.strategy, self.fetched_at = crumb, strategy, time.time()
+        self.refreshes += 1
+        logger.debug("Renewed Yahoo crumb (%s cookie)", strategy)
+
+    async def maintain(self):
+        """Renew the crumb if yfinance has dropped it or it is older than max_age."""
+        current = self._data._crumb
+        if current is not None and current != self.crumb:
+            # yfinance renewed it inline after a rejected request
+            self.crumb, self.fetched_at = current, time.time()
+        if current is None or time.time() - self.fetched_at >= self.max_age:
+            await run_blocking("session", self.refresh)
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, proxy: Optional[str] = None) -> Any:
+        """GET a Yahoo endpoint yfinance has no wrapper for, with the shared cookie and crumb. Blocking."""
+        return self._data.get_raw_json(url, params=params, proxy=proxy)
+
+    def close(self):
+        self.session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "hosts": len(self.adapter.poolmanager.pools),
+            "cookie_strategy": self.strategy,
+            "crumb_age": time.time() - self.fetched_at if self.fetched_at is not None else None,
+            "crumb_refreshes": self.refreshes,
+            "crumb_failures": self.failures,
+        }
+
+yahoo = YahooSession()
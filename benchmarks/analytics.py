@@ -0,0 +1,42 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.analytics import align_returns, measure_matrix
+
+def make_histories(symbols: int, bars: int, missing: float) -> dict:
+    """Synthetic daily closes with a share of missing bars per symbol."""
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2015-01-02", periods=bars, tz="America/New_York", name="Date")
+    market = rng.normal(0, 0.01, bars)
+    histories = {}
+    for i in range(symbols):
+        returns = rng.uniform(0.5, 1.5) * market + rng.normal(0, 0.01, bars)
+        frame = pd.DataFrame({"Close": 100 * np.exp(np.cumsum(returns))}, index=index)
+        histories[f"S{i}"] = frame[rng.random(bars) >= missing]
+    return histories
+
+def main():
+    parser = argparse.ArgumentParser(description="Time cross-symbol return matrices")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--bars", type=int, default=756)
+    parser.add_argument("--lookback", type=int, default=252)
+    parser.add_argument("--missing", type=float, default=0.02)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'align':>8} {'correlation':>12} {'pandas corr':>12}")
+    for symbols in args.symbols:
+        histories = make_histories(symbols, args.bars, args.missing)
+        started = time.perf_counter()
+        _, returns = align_returns(histories, "log", False, args.lookback)
+        aligned = time.perf_counter()
+        measure_matrix(returns, "correlation")
+        computed = time.perf_counter()
+        pd.DataFrame(returns).corr()
+        reference = time.perf_counter()
+        print(f"{symbols:>8} {aligned - started:>8.4f} {computed - aligned:>12.4f} {reference - computed:>12.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from app.models.ticker_models import TickerResponse
+from app.utils.serializers import dataframe_to_dict, json_response
+
+def make_history(rows: int, interval: str) -> pd.DataFrame:
+    """A synthetic Ticker.history() frame with a tz-aware index."""
+    index = pd.date_range("2015-01-02 09:30", periods=rows, freq=interval, tz="America/New_York", name="Datetime")
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, rows))
+    frame = pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.05, rows),
+            "High": close + 0.1,
+            "Low": close - 0.1,
+            "Close": close,
+            "Volume": rng.integers(0, 1_000_000, rows),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+    frame.iloc[::97, 0] = np.nan
+    return frame
+
+def baseline(frame: pd.DataFrame) -> bytes:
+    """The previous path: records dicts, model validation, stdlib encoding."""
+    records = frame.reset_index().to_dict(orient="records")
+    response = TickerResponse(data=records)
+    return json.dumps(jsonable_encoder(response)).encode()
+
+def fast(frame: pd.DataFrame, orient: str) -> bytes:
+    return json_response(dataframe_to_dict(frame, orient)).body
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare history payload serialization paths")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'path':<16} {'seconds':>9} {'speedup':>8} {'bytes':>11}")
+    for rows in args.rows:
+        frame = make_history(rows, "1min")
+        reference = timed(lambda: baseline(frame), args.repeat)
+        print(f"{rows:>8} {'baseline':<16} {reference:>9.4f} {1:>7.1f}x {len(baseline(frame)):>11}")
+        for orient in ("records", "split", "columns"):
+            seconds = timed(lambda: fast(frame, orient), args.repeat)
+            size = len(fast(frame, orient))
+            print(f"{rows:>8} {'orjson/' + orient:<16} {seconds:>9.4f} {reference / seconds:>7.1f}x {size:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import asyncio
+import pickle
+import time
+import zlib
+
+import pytest
+
+from app.config import REDIS_KEY_PREFIX
+from app.utils.cache import MISSING, RedisBackend, StoredValue, encode_value
+
+fakeredis = pytest.importorskip("fakeredis")
+
+# A pickled instance of gone_module.Gone: a class an older or newer release
+# had and this one does not
+MISSING_CLASS_PICKLE = b"\x80\x04\x95\x1a\x00\x00\x00\x00\x00\x00\x00\x8c\x0bgone_module\x94\x8c\x04Gone\x94\x93\x94)\x81\x94."
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+@pytest.fixture
+def client():
+    return fakeredis.aioredis.FakeRedis()
+
+def test_round_trip(client):
+    backend = RedisBackend(client=client, stale_ttl=60)
+    value = {"symbol": "AAPL", "prices": [189.5, 190.25], "nested": {"volume": 1000}}
+    _run(backend.set("info:AAPL", value, 30))
+    assert _run(backend.get("info:AAPL")) == value
+    assert backend.hits == 1
+    assert backend.bytes_written > 0
+
+def test_missing_key_is_a_miss(client):
+    backend = RedisBackend(client=client)
+    assert _run(backend.get("info:NOPE")) is MISSING
+    assert _run(backend.get_stale("info:NOPE")) is MISSING
+    assert backend.misses == 1
+
+def test_key_outlives_its_ttl_by_the_stale_ttl(client):
+    backend = RedisBackend(client=client, stale_ttl=60)
+    _run(backend.set("info:AAPL", 1, 30))
+    assert 85 <= _run(client.ttl(backend.prefix + "info:AAPL")) <= 90
+
+def test_expired_value_is_a_miss_but_served_stale(client):
+    backend = RedisBackend(client=client)
+    expired = StoredValue(time.time() - 1, "old")
+    _run(client.set(backend.prefix + "info:AAPL", encode_value(expired)))
+    assert _run(backend.get("info:AAPL")) is MISSING
+    assert _run(backend.get_stale("info:AAPL")) == "old"
+    assert backend.stale_hits == 1
+
+def test_zero_ttl_is_not_stored(client):
+    backend = RedisBackend(client=client)
+    _run(backend.set("info:AAPL", 1, 0))
+    assert _run(client.get(backend.prefix + "info:AAPL")) is None
+
+def test_value_without_deadline_is_fresh_until_the_key_expires(client):
+    backend = RedisBackend(client=client)
+    _run(client.set(backend.prefix + "info:AAPL", encode_value("plain")))
+    assert _run(backend.get("info:AAPL")) == "plain"
+
+@pytest.mark.parametrize("payload", [
+    b"not zlib at all",
+    zlib.compress(b"not a pickle"),
+    zlib.compress(MISSING_CLASS_PICKLE),
+])
+def test_undecodable_value_is_deleted_and_a_miss(client, payload):
+    backend = RedisBackend(client=client)
+    key = backend.prefix + "info:AAPL"
+    _run(client.set(key, payload))
+    assert _run(backend.get("info:AAPL")) is MISSING
+    assert _run(client.get(key)) is None
+    assert backend.decode_errors == 1
+    assert backend.errors == 0
+
+    _run(client.set(key, payload))
+    assert _run(backend.get_stale("info:AAPL")) is MISSING
+    assert backend.decode_errors == 2
+    assert backend.stats()["decode_errors"] == 2
+
+def test_missing_class_pickle_names_a_missing_class():
+    with pytest.raises(ModuleNotFoundError):
+        pickle.loads(MISSING_CLASS_PICKLE)
+
+def test_default_prefix_carries_a_format_version():
+    assert REDIS_KEY_PREFIX.rstrip(":").rsplit(":", 1)[-1] == "v1"
+
+def test_prefixes_keep_format_versions_apart(client):
+    old = RedisBackend(client=client, prefix="yfinance-api:")
+    new = RedisBackend(client=client, prefix="yfinance-api:v1:")
+    _run(old.set("info:AAPL", "old format", 30))
+    assert _run(new.get("info:AAPL")) is MISSING
+    _run(new.set("info:AAPL", "new format", 30))
+    assert _run(new.get("info:AAPL")) == "new format"
+
+    # clear() only touches its own namespace
+    _run(new.clear())
+    assert _run(new.get("info:AAPL")) is MISSING
+    assert _run(old.get("info:AAPL")) == "old format"
@@ -0,0 +1,52 @@
+import asyncio
+
+import pandas as pd
+import pytest
+import yfinance as yf
+
+from app.services import corporate_actions as corporate_actions_module
+from app.services.corporate_actions import load_corporate_actions
+from app.utils.cache import MISSING, make_key, response_cache
+from app.utils.gateway import UpstreamUnavailable
+
+def _history(dividends, splits):
+    """A daily history frame shaped like the one yfinance keeps in Ticker._history."""
+    index = pd.date_range("2024-01-02", periods=len(dividends), freq="D", tz="America/New_York", name="Date")
+    return pd.DataFrame(
+        {"Close": 100.0, "Volume": 1000, "Dividends": dividends, "Stock Splits": splits},
+        index=index,
+    )
+
+def _ticker(symbol, history):
+    ticker = yf.Ticker(symbol)
+    if history is None:
+        # history() failed: yfinance returns an empty frame and keeps no _history
+        ticker.history = lambda *args, **kwargs: pd.DataFrame()
+    else:
+        ticker._history = history
+    return ticker
+
+def _use(monkeypatch, history):
+    monkeypatch.setattr(corporate_actions_module, "new_ticker", lambda symbol: _ticker(symbol, history))
+
+def test_symbol_without_actions_gives_empty_views(monkeypatch):
+    _use(monkeypatch, _history([0.0, 0.0, 0.0], [0.0, 0.0, 0.0]))
+    frames = asyncio.run(load_corporate_actions("NOACTS"))
+    assert sorted(frames) == ["actions", "dividends", "splits"]
+    for frame in frames.values():
+        assert isinstance(frame.index, pd.DatetimeIndex)
+        assert len(frame.index) == 0
+
+def test_actions_are_split_into_views(monkeypatch):
+    _use(monkeypatch, _history([0.0, 0.24, 0.0], [0.0, 0.0, 4.0]))
+    frames = asyncio.run(load_corporate_actions("SOMEACTS"))
+    assert len(frames["actions"].index) == 2
+    assert frames["dividends"].data["Dividends"].tolist() == [0.24]
+    assert frames["splits"].data["Stock Splits"].tolist() == [4.0]
+
+def test_failed_history_raises_and_is_not_cached(monkeypatch):
+    _use(monkeypatch, None)
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(load_corporate_actions("FAILED"))
+    key = make_key("corporate_actions", "FAILED", None)
+    assert asyncio.run(response_cache.get(key)) is MISSING
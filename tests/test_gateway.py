@@ -0,0 +1,294 @@
+import asyncio
+import random
+
+import pytest
+import requests
+
+from app.utils.gateway import (
+    CircuitBreaker,
+    CircuitOpenError,
+    TokenBucket,
+    UpstreamGateway,
+    UpstreamUnavailable,
+    in_background,
+)
+
+class FakeClock:
+    """A monotonic clock that only moves when something sleeps on it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+        await asyncio.sleep(0)
+
+async def direct(upstream, fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+def _gateway(clock, **kwargs):
+    options = dict(rate=0, burst=1, max_attempts=3, backoff_base=0.5, backoff_max=8, failure_threshold=2, reset_timeout=30)
+    options.update(kwargs)
+    return UpstreamGateway(direct, clock=clock, sleep=clock.sleep, rng=random.Random(1), **options)
+
+class Flaky:
+    """Raise each queued error in turn, then return "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+# TokenBucket
+
+def test_bucket_admits_a_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        for _ in range(5):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    assert clock.sleeps == [0.5, 0.5]
+    assert bucket.waited == pytest.approx(1.0)
+
+def test_bucket_refills_up_to_the_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=2, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        await bucket.acquire()
+        await bucket.acquire()
+        clock.now += 100
+        await bucket.acquire()
+        await bucket.acquire()
+        await bucket.acquire()
+
+    asyncio.run(run())
+    assert clock.sleeps == [1.0]
+
+def test_concurrent_waiters_queue_in_order():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+    sleeps = []
+
+    async def record(delay):
+        sleeps.append(delay)
+
+    bucket.sleep = record
+
+    async def run():
+        await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+
+    asyncio.run(run())
+    # Each reservation waits one more token's worth than the one before it
+    assert sleeps == [1.0, 2.0, 3.0]
+
+def test_background_never_reserves_ahead_of_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+    order = []
+
+    async def call(name, background):
+        await bucket.acquire(background)
+        order.append(name)
+
+    async def run():
+        await bucket.acquire()
+        background = [asyncio.create_task(call(f"bg{i}", True)) for i in range(3)]
+        await asyncio.sleep(0)
+        # Arrives after the background calls are waiting, but goes first
+        await call("request", False)
+        await asyncio.gather(*background)
+
+    asyncio.run(run())
+    assert order == ["request", "bg0", "bg1", "bg2"]
+
+def test_zero_rate_disables_the_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0, burst=1, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        await asyncio.gather(*(bucket.acquire() for _ in range(10)))
+
+    asyncio.run(run())
+    assert clock.sleeps == []
+
+# CircuitBreaker
+
+def test_breaker_opens_after_threshold_and_half_opens_after_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=2, reset_timeout=30, clock=clock)
+    breaker.failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.state == "half_open"
+    # A single trial call at a time
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_successful_trial_closes_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30, clock=clock)
+    breaker.failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+def test_failed_trial_reopens_for_another_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30, clock=clock)
+    breaker.failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+    clock.now += 30
+    assert breaker.allow()
+
+def test_released_trial_lets_another_be_tried():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30, clock=clock)
+    breaker.failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+# UpstreamGateway
+
+def test_transient_errors_are_retried_with_jittered_backoff():
+    clock = FakeClock()
+    gateway = _gateway(clock, failure_threshold=10)
+    fn = Flaky(requests.exceptions.ConnectionError("reset"), TimeoutError("timed out"))
+    assert asyncio.run(gateway.call("ticker", fn)) == "ok"
+    assert fn.calls == 3
+    assert gateway.retries["ticker"] == 2
+    # Full jitter: uniform(0, base * 2 ** (attempt - 1)), capped at backoff_max
+    expected = random.Random(1)
+    assert clock.sleeps == [expected.uniform(0, 0.5), expected.uniform(0, 1.0)]
+    assert gateway.breaker("ticker").state == "closed"
+
+def test_backoff_is_capped():
+    clock = FakeClock()
+    gateway = _gateway(clock, backoff_base=1, backoff_max=4)
+    assert all(gateway.backoff(attempt) <= 4 for attempt in range(1, 20))
+
+def test_retries_run_out_as_upstream_unavailable():
+    clock = FakeClock()
+    gateway = _gateway(clock, failure_threshold=10)
+    fn = Flaky(*[requests.exceptions.Timeout("slow")] * 5)
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(gateway.call("ticker", fn))
+    assert fn.calls == 3
+    assert len(clock.sleeps) == 2
+
+def test_bad_requests_are_not_retried_and_leave_the_breaker_alone():
+    clock = FakeClock()
+    gateway = _gateway(clock, failure_threshold=1)
+    fn = Flaky(KeyError("no such symbol"))
+    with pytest.raises(KeyError):
+        asyncio.run(gateway.call("ticker", fn))
+    assert fn.calls == 1
+    assert clock.sleeps == []
+    assert gateway.breaker("ticker").state == "closed"
+    assert gateway.breaker("ticker").failures == 0
+
+def test_open_circuit_fails_fast_then_recovers():
+    clock = FakeClock()
+    gateway = _gateway(clock, max_attempts=1, failure_threshold=2)
+    failing = Flaky(*[ConnectionError("down")] * 2)
+    for _ in range(2):
+        with pytest.raises(UpstreamUnavailable):
+            asyncio.run(gateway.call("market", failing))
+    healthy = Flaky()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(gateway.call("market", healthy))
+    assert healthy.calls == 0
+    assert gateway.rejected["market"] == 1
+    # Other upstreams have circuits of their own
+    assert asyncio.run(gateway.call("ticker", healthy)) == "ok"
+
+    clock.now += 30
+    assert asyncio.run(gateway.call("market", healthy)) == "ok"
+    assert gateway.breaker("market").state == "closed"
+
+def test_cancelled_trial_does_not_wedge_the_circuit():
+    # Regression: a half-open trial whose caller was cancelled kept the
+    # trial slot, so every later call was rejected for good
+    clock = FakeClock()
+    started = asyncio.Event()
+
+    async def runner(upstream, fn, *args, **kwargs):
+        if fn == "hang":
+            started.set()
+            await asyncio.Event().wait()
+        return fn(*args, **kwargs)
+
+    gateway = UpstreamGateway(runner, rate=0, burst=1, max_attempts=1, failure_threshold=1, reset_timeout=30, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        with pytest.raises(UpstreamUnavailable):
+            await gateway.call("ticker", Flaky(ConnectionError("down")))
+        clock.now += 30
+        trial = asyncio.create_task(gateway.call("ticker", "hang"))
+        await started.wait()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        return await gateway.call("ticker", Flaky())
+
+    assert asyncio.run(run()) == "ok"
+    assert gateway.breaker("ticker").state == "closed"
+
+def test_failed_bad_request_trial_does_not_wedge_the_circuit():
+    clock = FakeClock()
+    gateway = _gateway(clock, max_attempts=1, failure_threshold=1)
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(gateway.call("ticker", Flaky(ConnectionError("down"))))
+    clock.now += 30
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.call("ticker", Flaky(ValueError("bad period"))))
+    assert asyncio.run(gateway.call("ticker", Flaky())) == "ok"
+
+def test_background_calls_yield_the_rate_to_requests():
+    clock = FakeClock()
+    gateway = _gateway(clock, rate=1, burst=1)
+    order = []
+
+    def record(name):
+        order.append(name)
+
+    async def refresh():
+        in_background.set(True)
+        await asyncio.gather(*(gateway.call("screener", record, f"bg{i}") for i in range(3)))
+
+    async def run():
+        await gateway.call("ticker", record, "first")
+        background = asyncio.create_task(refresh())
+        await asyncio.sleep(0)
+        await gateway.call("ticker", record, "request")
+        await background
+
+    asyncio.run(run())
+    assert order == ["first", "request", "bg0", "bg1", "bg2"]
@@ -0,0 +1,37 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from app.models.ticker_models import HistoryParams
+from app.services import history_store as history_store_module
+from app.services.history_store import HistoryStore, storable
+
+@pytest.mark.parametrize("symbol", ["AAPL", "BRK-B", "^GSPC", "EURUSD=X", "RDS.A", "7203.T"])
+def test_ticker_symbols_are_storable(symbol):
+    assert storable(symbol)
+
+@pytest.mark.parametrize("symbol", ["M&M.NS", "..", ".", "../etc", "A/B", "", "X" * 33])
+def test_other_symbols_are_not_storable(symbol):
+    assert not storable(symbol)
+
+def test_unstorable_symbol_falls_back_to_yahoo(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path), ["1d"])
+    assert store.supports("AAPL", HistoryParams())
+    assert not store.supports("M&M.NS", HistoryParams())
+    with pytest.raises(ValueError):
+        store._path("M&M.NS", "1d", False)
+
+    frame = pd.DataFrame({"Close": [2710.5]}, index=pd.DatetimeIndex(["2024-01-02"], name="Date"))
+    fetched = []
+
+    def fetch_history(symbol, params):
+        fetched.append(symbol)
+        return frame
+
+    monkeypatch.setattr(history_store_module, "history_store", store)
+    monkeypatch.setattr(history_store_module, "fetch_history", fetch_history)
+    history = asyncio.run(history_store_module.load_history("M&M.NS", HistoryParams()))
+    assert fetched == ["M&M.NS"]
+    assert history["Close"].tolist() == [2710.5]
+    assert not any(tmp_path.iterdir())
@@ -0,0 +1,42 @@
+import math
+
+import pytest
+import requests
+
+from app.utils.gateway import UpstreamUnavailable, is_retryable
+from app.utils.serializers import fast_info_to_dict
+
+class FakeFastInfo:
+    """A FastInfo stand-in: a field is a value, or an exception raised on access."""
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def keys(self):
+        return list(self.fields)
+
+    def __getitem__(self, key):
+        value = self.fields[key]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+def test_missing_fields_are_none():
+    fast_info = FakeFastInfo(lastPrice=190.5, shares=KeyError("sharesOutstanding"), currency="USD")
+    assert fast_info_to_dict(fast_info) == {"lastPrice": 190.5, "shares": None, "currency": "USD"}
+
+def test_network_errors_are_raised_for_the_gateway():
+    fast_info = FakeFastInfo(lastPrice=190.5, previousClose=requests.exceptions.ConnectionError("offline"))
+    with pytest.raises(requests.exceptions.ConnectionError) as raised:
+        fast_info_to_dict(fast_info)
+    assert is_retryable(raised.value)
+
+def test_quote_without_last_price_is_unavailable():
+    fast_info = FakeFastInfo(lastPrice=None, dayHigh=None, yearHigh=math.nan, currency="USD")
+    with pytest.raises(UpstreamUnavailable):
+        fast_info_to_dict(fast_info)
+
+def test_quote_with_no_fields_is_unavailable():
+    fast_info = FakeFastInfo(shares=None, marketCap=KeyError("marketCap"))
+    with pytest.raises(UpstreamUnavailable):
+        fast_info_to_dict(fast_info, ["shares", "marketCap"])
@@ -0,0 +1,62 @@
+import asyncio
+
+from app.services import symbol_index as symbol_index_module
+from app.services.symbol_index import SymbolIndex
+
+LISTING = """# test listing
+symbol,name,exchange,type
+AAPL,Apple Inc.,NMS,EQUITY
+MSFT,Microsoft Corporation,NMS,EQUITY
+"""
+
+UPSTREAM = [
+    {"symbol": "ZZQX", "shortname": "Zzqx Holdings", "exchange": "NYQ", "quoteType": "EQUITY", "score": 20000.0},
+    {"symbol": "ZZQX.L", "longname": "Zzqx Holdings plc", "exchange": "LSE", "quoteType": "EQUITY", "score": 100.0},
+]
+
+def _index(tmp_path):
+    path = tmp_path / "symbols.csv"
+    path.write_text(LISTING)
+    index = SymbolIndex(str(path))
+    asyncio.run(index.refresh())
+    return index
+
+def test_local_hit_skips_upstream(tmp_path, monkeypatch):
+    def search_quotes(query, limit, proxy=None):
+        raise AssertionError("upstream queried for a local hit")
+
+    monkeypatch.setattr(symbol_index_module, "search_quotes", search_quotes)
+    index = _index(tmp_path)
+    results = asyncio.run(index.lookup("aap"))
+    assert results[0]["symbol"] == "AAPL"
+    assert index.stats()["local_hits"] == 1
+
+def test_miss_goes_upstream_and_learns(tmp_path, monkeypatch):
+    calls = []
+
+    def search_quotes(query, limit, proxy=None):
+        calls.append((query, limit, proxy))
+        return UPSTREAM
+
+    monkeypatch.setattr(symbol_index_module, "search_quotes", search_quotes)
+    index = _index(tmp_path)
+    results = asyncio.run(index.lookup("zzqx-miss-path", 5))
+    assert calls == [("zzqx-miss-path", 5, None)]
+    assert [result["symbol"] for result in results] == ["ZZQX", "ZZQX.L"]
+    assert results[1]["name"] == "Zzqx Holdings plc"
+    assert index.stats()["upstream_queries"] == 1
+
+    # The upstream listings were merged, so the next lookup is answered locally
+    results = asyncio.run(index.lookup("zzqx"))
+    assert results[0]["symbol"] == "ZZQX"
+    assert len(calls) == 1
+    assert index.stats()["local_hits"] == 1
+
+def test_miss_falls_back_to_fuzzy_matches(tmp_path, monkeypatch):
+    def search_quotes(query, limit, proxy=None):
+        raise ConnectionError("Yahoo unavailable")
+
+    monkeypatch.setattr(symbol_index_module, "search_quotes", search_quotes)
+    index = _index(tmp_path)
+    results = asyncio.run(index.lookup("microsoft corporatoin"))
+    assert results and results[0]["symbol"] == "MSFT"